@@ -8,36 +8,156 @@ Flask web application with:
 - Right: 4 extracted photos
 """
 
-from flask import Flask, render_template, jsonify, send_from_directory, request
+from flask import Flask, Response, render_template, jsonify, send_from_directory, request, abort
+from werkzeug.security import safe_join
 from pathlib import Path
 from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import gzip
+import mimetypes
 import json
+import os
 import threading
+import time
+
+import cv2
+import numpy as np
 
 from scanners import ScannerManager, ScanSettings, ColorMode
-from smart_split import split_photos_grid_smart
+from scanners.base import ScannerError, ScannerNotFoundError, save_image, write_atomic
+from smart_split import split_photos_grid_smart, split_photos_grid_smart_array
 
 app = Flask(__name__)
 
+# Let a fronting web server stream image files instead of the Python worker.
+# USE_X_SENDFILE=1 for Apache/lighttpd (mod_xsendfile),
+# X_ACCEL_REDIRECT=1 for nginx internal locations (see docs/WEB_INTERFACE.md).
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+X_ACCEL_REDIRECT = os.environ.get('X_ACCEL_REDIRECT') == '1'
+
 # Directories
 SCANS_DIR = Path("output/scans")
 PHOTOS_DIR = Path("photos")
 SCANS_DIR.mkdir(parents=True, exist_ok=True)
 PHOTOS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Browser cache lifetime for scans (seconds)
+SCAN_MAX_AGE = 86400
+
+# Sidebar thumbnail width (pixels), written as <scan>.thumb.jpg next to the scan
+THUMB_WIDTH = 256
+
+# How long a detected scanner is reused before probing devices again (seconds)
+SCANNER_CACHE_TTL = 60
+
 # Global state
-scan_in_progress = False
+# One reusable worker thread runs scans; the last future reports progress/errors
+_scan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scan')
+_scan_future = None
+_scan_submit_lock = threading.Lock()  # Makes check-and-submit atomic
 scanner_manager = None
 
+# Preferred scanner from the last device probe, and when it was probed
+_preferred_scanner = None
+_preferred_at = 0.0
+
+# Cached /api/scans payload, rebuilt when a directory mtime changes.
+# 'generation' counts invalidations, so a rebuild that overlapped one
+# doesn't store what it read as current
+_scans_cache = {'key': None, 'payload': None, 'gzipped': None, 'generation': 0}
+_scans_cache_lock = threading.Lock()
+
+
+def _scans_cache_key():
+    """Cache key for the scans listing (directory mtimes)"""
+    return (os.stat(SCANS_DIR).st_mtime_ns, os.stat(PHOTOS_DIR).st_mtime_ns)
+
+
+def invalidate_scans_cache():
+    """
+    Force the next /api/scans call to rebuild the listing.
+    
+    Needed when files are overwritten in place (re-split), which
+    does not change the directory mtime.
+    """
+    with _scans_cache_lock:
+        _scans_cache['generation'] += 1
+        _scans_cache['key'] = None
+
+
+def _scans_response():
+    """Serve the cached listing, gzip-compressed when the client accepts it"""
+    return _scans_payload_response(_scans_cache['payload'], _scans_cache['gzipped'])
+
+
+def _scans_payload_response(payload, gzipped):
+    """Serve a listing, gzip-compressed when the client accepts it"""
+    if 'gzip' in request.accept_encodings:
+        response = Response(gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(payload, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def write_thumbnail(img, scan_path):
+    """
+    Write a small JPEG preview of a scan for the sidebar.
+    
+    Args:
+        img: BGR scan image
+        scan_path: Path of the full-size scan; the thumbnail goes next to it
+    """
+    h, w = img.shape[:2]
+    thumb = cv2.resize(img, (THUMB_WIDTH, max(1, h * THUMB_WIDTH // w)),
+                       interpolation=cv2.INTER_AREA)
+    thumb_path = scan_path.with_name(f"{scan_path.stem}.thumb.jpg")
+    ok, encoded = cv2.imencode('.jpg', thumb, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    if not ok:
+        raise IOError(f"Cannot encode thumbnail: {thumb_path}")
+    # Renamed into place: thumbnails are served as immutable, so a listing
+    # must never see one half-written
+    return write_atomic(thumb_path, encoded)
+
 
 def init_scanner():
     """Initialize scanner manager"""
     global scanner_manager
     if scanner_manager is None:
         scanner_manager = ScannerManager()
+        # Stop mDNS browsing and close pooled scanner connections on shutdown
+        atexit.register(scanner_manager.close)
     return scanner_manager
 
 
+def get_preferred_scanner(refresh=False):
+    """
+    Get the preferred scanner, reusing the last probe for SCANNER_CACHE_TTL.
+    
+    Args:
+        refresh: Probe devices even if the cached scanner is still fresh
+    """
+    global _preferred_scanner, _preferred_at
+    
+    manager = init_scanner()
+    now = time.monotonic()
+    if refresh or _preferred_scanner is None or now - _preferred_at > SCANNER_CACHE_TTL:
+        if refresh:
+            manager.invalidate_cache()
+        _preferred_scanner = manager.get_preferred_scanner()
+        _preferred_at = now
+    return _preferred_scanner
+
+
+def forget_preferred_scanner():
+    """Drop the cached scanner so the next scan probes devices again"""
+    global _preferred_scanner
+    _preferred_scanner = None
+
+
 @app.route('/')
 def index():
     """Main page"""
@@ -47,50 +167,111 @@ def index():
 @app.route('/api/scans')
 def list_scans():
     """List all scanned files"""
+    with _scans_cache_lock:
+        generation = _scans_cache['generation']
+        key = _scans_cache_key()
+        if key == _scans_cache['key']:
+            return _scans_response()
+    
+    # Index the photos directory once, grouped by the scan they came from
+    photos_by_base = defaultdict(list)
+    split_logs = set()
+    with os.scandir(PHOTOS_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith('.png') and '_photo' in entry.name:
+                photos_by_base[entry.name.split('_photo', 1)[0]].append(entry.name)
+            elif entry.name.endswith('_split_log.txt'):
+                split_logs.add(entry.name)
+    
+    with os.scandir(SCANS_DIR) as entries:
+        scan_entries = []
+        thumbs = set()
+        for entry in entries:
+            if not entry.name.startswith('scan_'):
+                continue
+            if entry.name.endswith('.thumb.jpg'):
+                thumbs.add(entry.name)
+            elif entry.name.endswith('.png'):
+                scan_entries.append(entry)
+    scan_entries.sort(key=lambda entry: entry.name, reverse=True)
+    
     scans = []
-    for scan_file in sorted(SCANS_DIR.glob("scan_*.png"), reverse=True):
+    for scan_entry in scan_entries:
         # Find associated photos
-        basename = scan_file.stem
-        photos = sorted(PHOTOS_DIR.glob(f"{basename}_photo*.png"))
+        basename = scan_entry.name[:-len('.png')]
+        photos = sorted(photos_by_base.get(basename, []))
         
         # Check for split log
-        log_file = PHOTOS_DIR / f"{basename}_split_log.txt"
+        log_name = f"{basename}_split_log.txt"
         split_log = None
-        if log_file.exists():
-            split_log = log_file.read_text()
+        if log_name in split_logs:
+            split_log = (PHOTOS_DIR / log_name).read_text()
         
         scans.append({
-            'filename': scan_file.name,
-            'path': f'/scans/{scan_file.name}',
-            'timestamp': scan_file.stat().st_mtime,
-            'photos': [f'/photos/{p.name}' for p in photos],
+            'filename': scan_entry.name,
+            'path': f'/scans/{scan_entry.name}',
+            'timestamp': scan_entry.stat().st_mtime,
+            'thumb': f'/scans/{basename}.thumb.jpg' if f'{basename}.thumb.jpg' in thumbs else None,
+            'photos': [f'/photos/{name}' for name in photos],
             'split_log': split_log
         })
     
-    return jsonify(scans)
+    payload = app.json.dumps(scans).encode()
+    gzipped = gzip.compress(payload, compresslevel=6)
+    
+    with _scans_cache_lock:
+        if _scans_cache['generation'] != generation:
+            # Invalidated while this listing was read: serve it, but leave
+            # the cache empty so the next request reads the files again
+            return _scans_payload_response(payload, gzipped)
+        _scans_cache['payload'] = payload
+        _scans_cache['gzipped'] = gzipped
+        _scans_cache['key'] = key
+        return _scans_response()
 
 
 @app.route('/api/scan', methods=['POST'])
 def trigger_scan():
     """Trigger a new scan"""
-    global scan_in_progress
+    global _scan_future
     
-    if scan_in_progress:
-        return jsonify({'error': 'Scan already in progress'}), 409
-    
-    # Start scan in background thread
-    thread = threading.Thread(target=perform_scan)
-    thread.daemon = True
-    thread.start()
+    with _scan_submit_lock:
+        if _scan_future is not None and not _scan_future.done():
+            return jsonify({'error': 'Scan already in progress'}), 409
+        
+        # Run scan on the background worker
+        _scan_future = _scan_pool.submit(perform_scan)
     
     return jsonify({'status': 'started'})
 
 
 @app.route('/api/scan/status')
 def scan_status():
-    """Get current scan status"""
+    """Get current scan status (and the error of the last scan, if any)"""
+    future = _scan_future
+    in_progress = future is not None and not future.done()
+    
+    error = None
+    if future is not None and future.done() and future.exception() is not None:
+        error = str(future.exception())
+    
+    return jsonify({
+        'in_progress': in_progress,
+        'error': error
+    })
+
+
+@app.route('/api/scanner/refresh', methods=['POST'])
+def refresh_scanner():
+    """Probe devices again and return the preferred scanner"""
+    scanner_info = get_preferred_scanner(refresh=True)
+    if scanner_info is None:
+        return jsonify({'error': 'No scanner available'}), 404
+    
     return jsonify({
-        'in_progress': scan_in_progress
+        'id': scanner_info.id,
+        'name': scanner_info.name,
+        'driver': scanner_info.driver
     })
 
 
@@ -113,6 +294,7 @@ def trigger_split():
             str(scan_path),
             str(PHOTOS_DIR)
         )
+        invalidate_scans_cache()
         
         return jsonify({
             'status': 'success',
@@ -123,19 +305,18 @@ def trigger_split():
 
 
 def perform_scan():
-    """Perform scan and split (runs in background)"""
-    global scan_in_progress
+    """
+    Perform scan and split (runs on the scan worker)
     
+    Errors are re-raised so the future reports them to /api/scan/status.
+    """
     try:
-        scan_in_progress = True
-        
         # Initialize scanner
         manager = init_scanner()
-        scanner_info = manager.get_preferred_scanner()
+        scanner_info = get_preferred_scanner()
         
         if scanner_info is None:
-            print("No scanner available")
-            return
+            raise ScannerError("No scanner available")
         
         # Generate filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -148,48 +329,96 @@ def perform_scan():
             format="PNG"
         )
         
-        # Scan
+        # Scan into memory; the PNG is written while the photos are split
         print(f"Scanning to: {scan_output}")
-        result = manager.scan(scanner_info, scan_output, settings)
+        image = manager.scan_to_memory(scanner_info, settings)
         
-        print(f"Scan complete: {result}")
+        print(f"Scan complete: {image.size[0]} x {image.size[1]}")
         
-        # Split photos
-        print("Splitting photos...")
-        photos = split_photos_grid_smart(
-            str(result),
-            str(PHOTOS_DIR)
-        )
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            scan_output.parent.mkdir(parents=True, exist_ok=True)
+            saved = pool.submit(save_image, image, scan_output)
+            
+            # convert() always copies, so skip it for the usual RGB scan
+            rgb = image if image.mode == 'RGB' else image.convert('RGB')
+            img = cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+            thumbnail = pool.submit(write_thumbnail, img, scan_output)
+            
+            # Split photos
+            print("Splitting photos...")
+            photos = split_photos_grid_smart_array(
+                img,
+                str(PHOTOS_DIR),
+                scan_output.stem
+            )
+            
+            saved.result()
+            thumbnail.result()
         
         print(f"Split complete: {len(photos)} photos")
         
     except Exception as e:
         print(f"Error during scan: {e}")
+        if isinstance(e, ScannerNotFoundError):
+            forget_preferred_scanner()
+        raise
     finally:
-        scan_in_progress = False
+        invalidate_scans_cache()
+
+
+def send_image(directory, filename, internal_location, max_age=None):
+    """
+    Send an image file, offloading the transfer to nginx when enabled.
+    
+    Conditional requests (If-None-Match / If-Modified-Since) are answered
+    with 304 Not Modified, either by Flask or by nginx.
+    
+    Args:
+        directory: Directory the file is served from
+        filename: Requested file name (relative to directory)
+        internal_location: nginx internal location mapped to directory
+        max_age: Cache lifetime in seconds (None = Flask default)
+    """
+    if not X_ACCEL_REDIRECT:
+        return send_from_directory(directory, filename, max_age=max_age,
+                                   conditional=True, etag=True)
+    
+    file_path = safe_join(str(directory), filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+    
+    response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.headers['X-Accel-Redirect'] = f'{internal_location}{filename}'
+    return response
 
 
 @app.route('/scans/<path:filename>')
 def serve_scan(filename):
     """Serve scanned images"""
-    response = send_from_directory(SCANS_DIR, filename)
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    # Scans are never rewritten (timestamped filenames), cache them for a day
+    response = send_image(SCANS_DIR, filename, '/_internal_scans/', max_age=SCAN_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.max_age = SCAN_MAX_AGE
+    response.cache_control.immutable = True
     return response
 
 
 @app.route('/photos/<path:filename>')
 def serve_photo(filename):
     """Serve photo images"""
-    response = send_from_directory(PHOTOS_DIR, filename)
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    # Re-splitting overwrites photos under the same name, so let the browser
+    # keep a copy but revalidate it (ETag / Last-Modified -> 304) every time
+    response = send_image(PHOTOS_DIR, filename, '/_internal_photos/', max_age=0)
+    response.cache_control.no_cache = True
+    response.cache_control.max_age = 0
     return response
 
 
 if __name__ == '__main__':
+    # Development server only. For serving, run under gunicorn:
+    #   gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:8090 app:app
+    # Keep a single worker process: scan state lives in this process, and
+    # the threads handle image downloads and status polling concurrently.
     print("=" * 60)
     print("A4 Scanner Web Interface")
     print("=" * 60)
@@ -202,4 +431,10 @@ if __name__ == '__main__':
     print("=" * 60)
     print()
     
-    app.run(debug=True, host='0.0.0.0', port=8090)
+    # FLASK_DEBUG=1 turns on the reloader and debugger for development
+    app.run(
+        debug=os.environ.get('FLASK_DEBUG') == '1',
+        host='0.0.0.0',
+        port=8090,
+        threaded=True
+    )
@@ -8,11 +8,55 @@ import cv2
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 
+FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
 
-def create_test_scan_with_photos(output_path: str = "output/test_4photos.png"):
+# Loaded fonts and measured label sizes, shared across calls
+_FONT_CACHE: dict[int, ImageFont.FreeTypeFont] = {}
+_TEXT_SIZE_CACHE: dict[tuple[str, int], tuple[int, int]] = {}
+
+
+def _get_font(size: int):
+    """Load the label font once per size, falling back to Pillow's default"""
+    font = _FONT_CACHE.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype(FONT_PATH, size)
+        except OSError:
+            font = ImageFont.load_default()
+        _FONT_CACHE[size] = font
+    return font
+
+
+def _text_size(label: str, size: int) -> tuple[int, int]:
+    """Width and height of a label rendered with _get_font(size)"""
+    text_size = _TEXT_SIZE_CACHE.get((label, size))
+    if text_size is None:
+        bbox = _get_font(size).getbbox(label)
+        text_size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        _TEXT_SIZE_CACHE[(label, size)] = text_size
+    return text_size
+
+
+def draw_rectangle_outline(arr: np.ndarray, x0: int, y0: int, x1: int, y1: int,
+                           color, width: int):
+    """
+    Draw a rectangle outline into an RGB array using slice writes.
+    Matches ImageDraw.rectangle: corners are inclusive, outline grows inwards.
+    """
+    arr[y0:y0 + width, x0:x1 + 1] = color
+    arr[y1 - width + 1:y1 + 1, x0:x1 + 1] = color
+    arr[y0:y1 + 1, x0:x0 + width] = color
+    arr[y0:y1 + 1, x1 - width + 1:x1 + 1] = color
+
+
+def create_test_scan_with_photos(output_path: str = "output/test_4photos.png", jpeg: bool = False):
     """
     Create a simulated A4 scan with 4 distinct photos arranged in 2x2 grid.
     Photos will have clear edges and slight rotation for testing.
+    
+    Args:
+        output_path: Where to save the test scan
+        jpeg: Save as JPEG (quality 90, .jpg suffix) instead of PNG
     """
     print("Creating test scan with 4 distinct photos...")
     
@@ -21,8 +65,7 @@ def create_test_scan_with_photos(output_path: str = "output/test_4photos.png"):
     height = 3508
     
     # Create white background
-    image = Image.new('RGB', (width, height), color='white')
-    draw = ImageDraw.Draw(image)
+    canvas = np.full((height, width, 3), 255, dtype=np.uint8)
     
     # Define 2x2 grid with spacing
     margin = 200
@@ -77,30 +120,32 @@ def create_test_scan_with_photos(output_path: str = "output/test_4photos.png"):
     
     # Draw each photo
     for photo_info in photos:
-        # Create individual photo
-        photo = Image.new('RGB', (photo_info['width'], photo_info['height']), 
-                         color=photo_info['color'])
-        photo_draw = ImageDraw.Draw(photo)
+        # Create individual photo as a pixel array
+        w = photo_info['width']
+        h = photo_info['height']
+        arr = np.full((h, w, 3), photo_info['color'], dtype=np.uint8)
         
         # Add border
         border_width = 15
-        photo_draw.rectangle(
-            [(border_width, border_width),
-             (photo_info['width'] - border_width, photo_info['height'] - border_width)],
-            outline='gray',
-            width=10
-        )
+        draw_rectangle_outline(arr, border_width, border_width,
+                               w - border_width, h - border_width,
+                               (128, 128, 128), 10)
+        
+        # Add some visual elements (simulated photo content)
+        # Draw a rectangle pattern
+        for i in range(3):
+            offset = 60 + i * 40
+            draw_rectangle_outline(arr, offset, offset, w - offset, h - offset,
+                                   (100, 100, 100), 2)
+        
+        photo = Image.fromarray(arr)
+        photo_draw = ImageDraw.Draw(photo)
         
         # Add label
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 80)
-        except:
-            font = ImageFont.load_default()
+        font = _get_font(80)
         
         # Get text size for centering
-        bbox = photo_draw.textbbox((0, 0), photo_info['label'], font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        text_width, text_height = _text_size(photo_info['label'], 80)
         
         text_x = (photo_info['width'] - text_width) // 2
         text_y = (photo_info['height'] - text_height) // 2
@@ -112,36 +157,50 @@ def create_test_scan_with_photos(output_path: str = "output/test_4photos.png"):
             font=font
         )
         
-        # Add some visual elements (simulated photo content)
-        # Draw a rectangle pattern
-        for i in range(3):
-            offset = 60 + i * 40
-            photo_draw.rectangle(
-                [(offset, offset),
-                 (photo_info['width'] - offset, photo_info['height'] - offset)],
-                outline=(100, 100, 100),
-                width=2
-            )
+        photo = np.asarray(photo)
+        x = photo_info['x']
+        y = photo_info['y']
         
-        # Rotate slightly
-        if photo_info['rotation'] != 0:
-            photo = photo.rotate(photo_info['rotation'], expand=True, fillcolor='white')
+        if photo_info['rotation'] == 0:
+            canvas[y:y + h, x:x + w] = photo
+            continue
         
-        # Paste onto main image
-        paste_x = photo_info['x']
-        paste_y = photo_info['y']
+        # Rotate slightly around the photo center and move it into its slot;
+        # warpAffine writes directly into the canvas, leaving pixels outside
+        # the rotated photo untouched (BORDER_TRANSPARENT)
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), photo_info['rotation'], 1.0)
         
-        # Adjust position if rotated (rotation expands the image)
-        if photo_info['rotation'] != 0:
-            paste_x -= (photo.width - photo_info['width']) // 2
-            paste_y -= (photo.height - photo_info['height']) // 2
+        # Only warp the canvas window the rotated photo can cover, not the page
+        cos = abs(matrix[0, 0])
+        sin = abs(matrix[0, 1])
+        half_w = (w * cos + h * sin) / 2 + 1
+        half_h = (w * sin + h * cos) / 2 + 1
+        x0 = max(0, int(x + w / 2 - half_w))
+        y0 = max(0, int(y + h / 2 - half_h))
+        x1 = min(width, int(x + w / 2 + half_w) + 1)
+        y1 = min(height, int(y + h / 2 + half_h) + 1)
         
-        image.paste(photo, (paste_x, paste_y))
+        matrix[0, 2] += x - x0
+        matrix[1, 2] += y - y0
+        cv2.warpAffine(
+            photo,
+            matrix,
+            (x1 - x0, y1 - y0),
+            dst=canvas[y0:y1, x0:x1],
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_TRANSPARENT
+        )
     
     # Save
     output_file = Path(output_path)
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    image.save(output_file, 'PNG', dpi=(300, 300))
+    image = Image.fromarray(canvas)
+    if jpeg:
+        output_file = output_file.with_suffix('.jpg')
+        image.save(output_file, 'JPEG', quality=90, dpi=(300, 300))
+    else:
+        # Fast deflate: the synthetic page compresses well even at level 1
+        image.save(output_file, 'PNG', dpi=(300, 300), compress_level=1, optimize=False)
     
     print(f"✓ Created: {output_file}")
     print(f"  Size: {width}x{height} pixels")
@@ -153,5 +212,6 @@ def create_test_scan_with_photos(output_path: str = "output/test_4photos.png"):
 if __name__ == "__main__":
     import sys
     
-    output = sys.argv[1] if len(sys.argv) > 1 else "output/test_4photos.png"
-    create_test_scan_with_photos(output)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    output = args[0] if args else "output/test_4photos.png"
+    create_test_scan_with_photos(output, jpeg="--jpeg" in sys.argv)
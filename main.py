@@ -22,77 +22,77 @@ def main():
     print()
     
     # Initialize scanner manager
-    manager = ScannerManager()
-    
-    # Show available scanners
-    manager.print_available_scanners()
-    
-    # Get preferred scanner
-    scanner = manager.get_preferred_scanner()
-    
-    if scanner is None:
-        print("✗ No scanners available!")
-        print("\nOptions:")
-        print("  1. Check scanner is powered on and connected")
-        print("  2. Install scanner drivers:")
-        print("     - macOS/Linux: brew install sane-backends && uv add python-sane")
-        print("     - Windows: uv add pywin32")
-        print("  3. Use simulation mode: uv run simulate_scan.py")
-        sys.exit(1)
-    
-    if scanner.driver == "simulation":
-        print("⚠️  Using simulation mode (no physical scanner found)")
-        print()
-    
-    # Generate output filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    scans_dir = Path("output") / "scans"
-    photos_dir = Path("photos")
-    scans_dir.mkdir(parents=True, exist_ok=True)
-    photos_dir.mkdir(parents=True, exist_ok=True)
-    scan_output = scans_dir / f"scan_{timestamp}.png"
-    
-    # Configure scan settings
-    settings = ScanSettings(
-        resolution=300,
-        color_mode=ColorMode.COLOR,
-        format="PNG"
-    )
-    
-    print("=" * 60)
-    print("STEP 1: Scanning")
-    print("=" * 60)
-    print()
-    print(f"Scanner: {scanner.name}")
-    print(f"Driver: {scanner.driver}")
-    print(f"Resolution: {settings.resolution} DPI")
-    print(f"Color mode: {settings.color_mode.value}")
-    print()
-    
-    if scanner.driver != "simulation":
-        print("Make sure document is on scanner bed...")
-        print()
-    
-    try:
-        # Scan
-        scanned_file = manager.scan(
-            scanner_info=scanner,
-            output_path=scan_output,
-            settings=settings
+    with ScannerManager() as manager:
+        
+        # Show available scanners
+        manager.print_available_scanners()
+        
+        # Get preferred scanner
+        scanner = manager.get_preferred_scanner()
+        
+        if scanner is None:
+            print("✗ No scanners available!")
+            print("\nOptions:")
+            print("  1. Check scanner is powered on and connected")
+            print("  2. Install scanner drivers:")
+            print("     - macOS/Linux: brew install sane-backends && uv add python-sane")
+            print("     - Windows: uv add pywin32")
+            print("  3. Use simulation mode: uv run simulate_scan.py")
+            sys.exit(1)
+        
+        if scanner.driver == "simulation":
+            print("⚠️  Using simulation mode (no physical scanner found)")
+            print()
+        
+        # Generate output filename
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        scans_dir = Path("output") / "scans"
+        photos_dir = Path("photos")
+        scans_dir.mkdir(parents=True, exist_ok=True)
+        photos_dir.mkdir(parents=True, exist_ok=True)
+        scan_output = scans_dir / f"scan_{timestamp}.png"
+        
+        # Configure scan settings
+        settings = ScanSettings(
+            resolution=300,
+            color_mode=ColorMode.COLOR,
+            format="PNG"
         )
         
+        print("=" * 60)
+        print("STEP 1: Scanning")
+        print("=" * 60)
+        print()
+        print(f"Scanner: {scanner.name}")
+        print(f"Driver: {scanner.driver}")
+        print(f"Resolution: {settings.resolution} DPI")
+        print(f"Color mode: {settings.color_mode.value}")
         print()
-        print(f"✓ Scan complete: {scanned_file}")
         
-    except KeyboardInterrupt:
-        print("\n\nCancelled by user")
-        sys.exit(0)
-    except Exception as e:
-        print(f"\n✗ Scan failed: {e}")
-        print("\nTry:")
-        print("  - Check scanner is ready (powered on, not in standby)")
-        print("  - Use simulation mode: uv run simulate_scan.py")
-        sys.exit(1)
+        if scanner.driver != "simulation":
+            print("Make sure document is on scanner bed...")
+            print()
+        
+        try:
+            # Scan
+            scanned_file = manager.scan(
+                scanner_info=scanner,
+                output_path=scan_output,
+                settings=settings
+            )
+            
+            print()
+            print(f"✓ Scan complete: {scanned_file}")
+            
+        except KeyboardInterrupt:
+            print("\n\nCancelled by user")
+            sys.exit(0)
+        except Exception as e:
+            print(f"\n✗ Scan failed: {e}")
+            print("\nTry:")
+            print("  - Check scanner is ready (powered on, not in standby)")
+            print("  - Use simulation mode: uv run simulate_scan.py")
+            sys.exit(1)
     
     # Split using smart edge detection
     print()
@@ -1,76 +1,200 @@
 #!/usr/bin/env python3
 """
 Proof of Concept: Split Scanned Image into 2x2 Grid
-Usage: python poc_split.py <input_image> [output_dir]
+Usage: python poc_split.py <input_image> [output_dir] [--jpeg] [--grid=RxC] [--reuse-split] [--debug]
+
+--reuse-split keeps a copy of the parts in ~/.cache/python-scan-4x4 and
+reuses it when the same file content is split again.
 """
 
+import io
+import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+
+import numpy as np
 from PIL import Image
 
+import scan_cache
+from scan_split_numba import split2x2
+from scanners.base import encode_png, imagecodecs, write_atomic
+
+
+def save_quadrant(quadrant, output_file, format="PNG", thumbnail=None):
+    """
+    Encode one quadrant (a view into the decoded scan) as PNG or JPEG.
+    
+    With thumbnail=(w, h) the quadrant is box-filtered down to that size
+    first (pillow-simd runs Image.BOX with AVX2).
+    """
+    if thumbnail:
+        quadrant = np.asarray(Image.fromarray(quadrant).resize(thumbnail, Image.BOX))
+    
+    if format == "JPEG":
+        buffer = io.BytesIO()
+        Image.fromarray(quadrant).save(buffer, "JPEG", quality=92, subsampling=2, optimize=False)
+        data = buffer.getbuffer()
+    else:
+        data = encode_png(quadrant)
+    
+    # Encode in memory, then publish with one write + rename: a killed run
+    # never leaves a truncated quadrant behind
+    return write_atomic(output_file, data)
+
+
+# Tile names for the classic 2x2 split (kept for existing output filenames)
+QUADRANT_NAMES = ["1_top_left", "2_top_right", "3_bottom_left", "4_bottom_right"]
+
 
-def split_image_2x2(input_path, output_dir="output"):
+def grid_tiles(arr, rows=2, cols=2):
+    """
+    Cut an image array into a rows x cols grid of tiles.
+    
+    Tiles are views into arr (no pixels are copied); the last row and
+    column absorb any remainder when the size does not divide evenly.
+    
+    Returns:
+        Dict of tile name -> view, in row-major order
     """
-    Split an image into a 2x2 grid (4 equal parts).
+    height, width = arr.shape[:2]
+    ys = [i * height // rows for i in range(rows + 1)]
+    xs = [j * width // cols for j in range(cols + 1)]
+    
+    if (rows, cols) == (2, 2):
+        names = QUADRANT_NAMES
+    else:
+        # Zero-padded so the names sort in row-major order
+        names = [f"{i * cols + j + 1:02d}_r{i + 1}c{j + 1}"
+                 for i in range(rows) for j in range(cols)]
+    
+    tiles = {}
+    for i in range(rows):
+        for j in range(cols):
+            tiles[names[i * cols + j]] = arr[ys[i]:ys[i + 1], xs[j]:xs[j + 1]]
+    return tiles
+
+
+def split_image_2x2(input_path, output_dir="output", format="PNG", base_name=None,
+                    use_cache=False, target_size=None, grid=(2, 2), thumbnail=None):
+    """
+    Split an image into a 2x2 grid (4 equal parts), or any rows x cols grid.
     
     Args:
-        input_path: Path to input image
+        input_path: Path to input image, an open binary file or mmap of one,
+            or an already loaded PIL image
         output_dir: Directory to save split images
+        format: "PNG" (lossless) or "JPEG" (quality 92, much smaller and faster)
+        base_name: Output filename prefix (default: input file stem, or "scan")
+        use_cache: Reuse quadrants from an earlier split of the same file content,
+            and keep a copy of these ones for the next time (see scan_cache)
+        target_size: Decode at roughly this (width, height) if the format allows;
+            JPEGs are scaled by 1/2, 1/4 or 1/8 inside libjpeg (no effect on PNG)
+        grid: (rows, cols) to split into, e.g. (4, 4)
+        thumbnail: Save each part resized to this (width, height) instead of full size
     
     Returns:
         List of output file paths
     """
-    input_file = Path(input_path)
+    cache_key = None
     
-    if not input_file.exists():
-        raise FileNotFoundError(f"Input file not found: {input_path}")
+    if isinstance(input_path, Image.Image):
+        # Split straight from memory, no PNG round-trip
+        source = nullcontext(input_path)
+        if base_name is None:
+            base_name = "scan"
+        print("Using in-memory image")
+    elif hasattr(input_path, "read"):
+        # Encoded image already in memory or mapped; decoded straight from the buffer
+        source = Image.open(input_path)
+        if target_size:
+            source.draft("RGB", target_size)
+        if base_name is None:
+            base_name = "scan"
+        print("Loading image from file object")
+    else:
+        input_file = Path(input_path)
+        
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        
+        if base_name is None:
+            base_name = input_file.stem  # filename without extension
+        
+        cache_key = scan_cache.file_key(input_file, format, target_size, grid, thumbnail) if use_cache else None
+        cached = scan_cache.cached_split(cache_key) if cache_key else None
+        if cached:
+            print(f"Reusing cached split of {input_file.name}")
+            output_path = Path(output_dir)
+            output_path.mkdir(exist_ok=True)
+            output_files = []
+            for part in cached:
+                output_file = output_path / f"{base_name}_{part.name}"
+                shutil.copyfile(part, output_file)
+                output_files.append(output_file)
+            return output_files
+        
+        source = Image.open(input_file)
+        if target_size:
+            source.draft("RGB", target_size)
+        print(f"Loading image: {input_file.name}")
     
-    print(f"Loading image: {input_file.name}")
-    img = Image.open(input_file)
-    width, height = img.size
-    print(f"  Dimensions: {width} x {height} pixels")
-    print(f"  Mode: {img.mode}")
-    print(f"  Format: {img.format}")
+    with source as img:
+        width, height = img.size
+        print(f"  Dimensions: {width} x {height} pixels")
+        print(f"  Mode: {img.mode}")
+        print(f"  Format: {img.format}")
+        
+        # Decode once; quadrants are views into this array
+        if img.mode == "P" or (format == "JPEG" and img.mode not in ("RGB", "L")):
+            img = img.convert("RGB")
+        arr = np.asarray(img)
     
-    # Calculate split points
-    mid_x = width // 2
-    mid_y = height // 2
+    rows, cols = grid
     
-    print(f"\nSplitting into 2x2 grid...")
-    print(f"  Each part: {mid_x} x {mid_y} pixels")
+    print(f"\nSplitting into {rows}x{cols} grid...")
+    print(f"  Each part: {width // cols} x {height // rows} pixels")
     
     # Create output directory
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
     
-    # Define quadrants
-    # Format: (left, top, right, bottom)
-    quadrants = {
-        "1_top_left": (0, 0, mid_x, mid_y),
-        "2_top_right": (mid_x, 0, width, mid_y),
-        "3_bottom_left": (0, mid_y, mid_x, height),
-        "4_bottom_right": (mid_x, mid_y, width, height)
-    }
+    quadrants = grid_tiles(arr, rows, cols)
+    if (split2x2 is not None and imagecodecs is not None and format != "JPEG"
+            and grid == (2, 2) and not thumbnail and arr.dtype == np.uint8):
+        # The PNG encoder wants contiguous buffers; fill all four in one pass
+        quadrants = dict(zip(QUADRANT_NAMES, split2x2(arr)))
     
-    output_files = []
+    suffix = ".jpg" if format == "JPEG" else ".png"
     
-    # Crop and save each quadrant
-    for name, box in quadrants.items():
-        print(f"  Cropping {name}... ", end="")
-        
-        cropped = img.crop(box)
-        
-        # Generate output filename
-        base_name = input_file.stem  # filename without extension
-        output_file = output_path / f"{base_name}_{name}.png"
+    # Save each tile; Pillow releases the GIL while deflating, so the
+    # encodes run on separate cores
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {
+            name: pool.submit(
+                save_quadrant,
+                tile,
+                output_path / f"{base_name}_{name}{suffix}",
+                format,
+                thumbnail
+            )
+            for name, tile in quadrants.items()
+        }
         
-        cropped.save(output_file, "PNG")
-        output_files.append(output_file)
-        
-        file_size = output_file.stat().st_size / 1024  # KB
-        print(f"✓ ({file_size:.1f} KB)")
+        output_files = []
+        for name, future in futures.items():
+            output_file = future.result()
+            output_files.append(output_file)
+            
+            file_size = output_file.stat().st_size / 1024  # KB
+            print(f"  Cropping {name}... ✓ ({file_size:.1f} KB)")
     
-    img.close()
+    if cache_key:
+        scan_cache.store_split(cache_key, {
+            f"{name}{suffix}": output_file
+            for name, output_file in zip(quadrants, output_files)
+        })
     
     return output_files
 
@@ -83,19 +207,32 @@ def main():
     print()
     
     # Check arguments
-    if len(sys.argv) < 2:
-        print("Usage: python poc_split.py <input_image> [output_dir]")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    
+    if len(args) < 1:
+        print("Usage: python poc_split.py <input_image> [output_dir] [--jpeg] [--grid=RxC] [--reuse-split] [--debug]")
         print()
         print("Example:")
         print("  python poc_split.py scan_20241128_173000.png")
         print("  python poc_split.py scan.png output_images/")
+        print("  python poc_split.py scan.png output_images/ --jpeg")
+        print("  python poc_split.py scan.png output_images/ --grid=4x4")
         sys.exit(1)
     
-    input_image = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "output"
+    input_image = args[0]
+    output_dir = args[1] if len(args) > 1 else "output"
+    format = "JPEG" if "--jpeg" in sys.argv else "PNG"
+    use_cache = "--reuse-split" in sys.argv
+    
+    grid = (2, 2)
+    for arg in sys.argv[1:]:
+        if arg.startswith("--grid="):
+            rows, cols = arg[len("--grid="):].lower().split("x")
+            grid = (int(rows), int(cols))
     
     try:
-        output_files = split_image_2x2(input_image, output_dir)
+        output_files = split_image_2x2(input_image, output_dir, format,
+                                       use_cache=use_cache, grid=grid)
         
         print(f"\n✓ Split complete!")
         print(f"  Output directory: {Path(output_dir).absolute()}")
@@ -105,8 +242,9 @@ def main():
         
     except Exception as e:
         print(f"\n✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        if "--debug" in sys.argv:
+            import traceback
+            traceback.print_exc()
         sys.exit(1)
 
 
@@ -1,71 +1,108 @@
 #!/usr/bin/env python3
 """
 Combined POC: Scan A4 Document and Split into 2x2 Grid
-Usage: python scan_and_split.py [output_dir]
+Usage: python scan_and_split.py [scanner_ip] [output_dir] [--reuse-scan] [--quiet] [--debug]
 
 This script combines both scanning and splitting functionality.
 Requires a physical scanner. For simulation, use simulate_scan.py first.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+
+import cv2
+import numpy as np
+
 from scanners.manager import ScannerManager
-from scanners.base import ScanSettings
-from smart_split import split_photos_grid_smart
+from scanners.base import ScanSettings, ColorMode, save_image
+from PIL import Image
+
+import scan_cache
+from smart_split import split_photos_grid_smart_array
 
 
-def scan_and_split(scanner_ip="192.168.1.208", output_dir="output"):
+def scan_and_split(scanner_ip="192.168.1.208", output_dir="output", keep_scan=True,
+                   reuse_scan_ttl=None):
     """
     Scan a document and split it into 2x2 grid.
     
+    The scan is split straight from memory; the full-page PNG is only
+    written (in the background) when keep_scan is set.
+    
     Args:
         scanner_ip: IP address of eSCL scanner
         output_dir: Directory to save split images
+        keep_scan: Also save the full scan under <output_dir>/scans
+        reuse_scan_ttl: Reuse the last scan taken with the same scanner and
+            settings if it is younger than this many seconds (None = always scan)
     
     Returns:
         List of split image file paths
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     scan_dir = Path(output_dir) / "scans"
-    scan_dir.mkdir(parents=True, exist_ok=True)
-    temp_scan_path = scan_dir / f"scan_{timestamp}.png"
+    scan_path = scan_dir / f"scan_{timestamp}.png"
     
-    try:
-        # Step 1: Scan document
-        print("=" * 60)
-        print("STEP 1: Scanning Document")
-        print("=" * 60)
-        
-        manager = ScannerManager()
+    # Step 1: Scan document
+    print("=" * 60)
+    print("STEP 1: Scanning Document")
+    print("=" * 60)
+    
+    # The drivers are only needed until the page is in memory
+    with ScannerManager() as manager:
         scanner_info = manager.get_preferred_scanner()
         
         if scanner_info is None:
             raise Exception("No scanner available")
         
         print(f"\nUsing scanner: {scanner_info.name} ({scanner_info.driver})")
-        print(f"Scanning to: {temp_scan_path}")
         
         settings = ScanSettings(
-            color_mode="RGB24",
             resolution=300,
-            source="Flatbed"
+            color_mode=ColorMode.COLOR
         )
         
-        manager.scan(scanner_info, temp_scan_path, settings)
+        cache_key = scan_cache.settings_key(scanner_info.id, settings)
+        cached = None
+        if reuse_scan_ttl is not None:
+            cached = scan_cache.cached_scan(cache_key, reuse_scan_ttl)
+        
+        if cached:
+            print(f"Reusing cached scan: {cached}")
+            image = Image.open(cached)
+            image.load()
+        else:
+            image = manager.scan_to_memory(scanner_info, settings)
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        writes = []
+        if reuse_scan_ttl is not None and not cached:
+            writes.append(pool.submit(scan_cache.store_scan, cache_key, image))
+        
+        if keep_scan:
+            print(f"Saving scan to: {scan_path}")
+            scan_dir.mkdir(parents=True, exist_ok=True)
+            writes.append(pool.submit(save_image, image, scan_path))
         
         # Step 2: Split into 2x2 grid using smart detection
         print("\n" + "=" * 60)
         print("STEP 2: Smart Splitting into 2x2 Grid")
         print("=" * 60)
         
-        split_files = split_photos_grid_smart(str(temp_scan_path), output_dir=output_dir)
+        if image.mode == "L":
+            # Grayscale scan: split the plane as is, no BGR round trip
+            img = np.asarray(image)
+        else:
+            rgb = image if image.mode == "RGB" else image.convert("RGB")
+            img = cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+        split_files = split_photos_grid_smart_array(img, output_dir, scan_path.stem)
         
-        return split_files
-        
-    except Exception as e:
-        print(f"Error during scan: {e}")
-        raise e
+        for write in writes:
+            write.result()
+    
+    return split_files
 
 
 def main():
@@ -76,22 +113,30 @@ def main():
     print()
     
     # Parse arguments
-    scanner_ip = sys.argv[1] if len(sys.argv) > 1 else "192.168.1.208"
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "output"
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    scanner_ip = args[0] if len(args) > 0 else "192.168.1.208"
+    output_dir = args[1] if len(args) > 1 else "output"
+    
+    # --reuse-scan: split the last scan (up to 10 minutes old) again instead of rescanning
+    reuse_scan_ttl = 600 if "--reuse-scan" in sys.argv else None
+    # --quiet: skip the per-file summary; --debug: print tracebacks on errors
+    quiet = "--quiet" in sys.argv
+    debug = "--debug" in sys.argv
     
     try:
         # Run the complete workflow
-        split_files = scan_and_split(scanner_ip, output_dir)
+        split_files = scan_and_split(scanner_ip, output_dir, reuse_scan_ttl=reuse_scan_ttl)
         
         # Summary
         print("\n" + "=" * 60)
         print("✓ WORKFLOW COMPLETE!")
         print("=" * 60)
-        print(f"\nGenerated {len(split_files)} split images in: {Path(output_dir).absolute()}")
-        print("\nFiles:")
-        for i, f in enumerate(split_files, 1):
-            size_kb = f.stat().st_size / 1024
-            print(f"  [{i}] {f.name} ({size_kb:.1f} KB)")
+        print(f"\nGenerated {len(split_files)} split images in: {output_dir}")
+        if not quiet:
+            print("\nFiles:")
+            for i, f in enumerate(map(Path, split_files), 1):
+                size_kb = f.stat().st_size / 1024
+                print(f"  [{i}] {f.name} ({size_kb:.1f} KB)")
         
     except KeyboardInterrupt:
         print("\n\nWorkflow cancelled by user.")
@@ -99,8 +144,9 @@ def main():
     
     except Exception as e:
         print(f"\n✗ Error during workflow: {e}")
-        import traceback
-        traceback.print_exc()
+        if debug:
+            import traceback
+            traceback.print_exc()
         sys.exit(1)
 
 
@@ -0,0 +1,114 @@
+"""
+Content-hash cache for scans and split results
+
+Stored under ~/.cache/python-scan-4x4/:
+- scans/<sha256(scanner, settings)>.png  - last scan taken with those settings
+- splits/<sha256(file bytes, format)>/   - quadrants produced from that file
+
+Split entries are full copies of the parts, so store_split() drops the ones
+not used for SPLIT_MAX_AGE and keeps at most SPLIT_MAX_ENTRIES.
+"""
+
+import hashlib
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_DIR = Path.home() / ".cache" / "python-scan-4x4"
+
+SPLIT_MAX_AGE = 7 * 24 * 3600  # seconds
+SPLIT_MAX_ENTRIES = 20
+
+
+def settings_key(scanner_id: str, settings) -> str:
+    """Cache key for a scan taken with the given scanner and settings"""
+    raw = repr((scanner_id, settings.resolution, settings.color_mode.value, settings.format))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def file_key(path, *extra) -> str:
+    """Cache key for a file's content (plus any options that affect the output)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(repr(extra).encode())
+    return digest.hexdigest()
+
+
+def cached_scan(key: str, ttl: float) -> Optional[Path]:
+    """Return the cached scan for key if it is younger than ttl seconds"""
+    path = CACHE_DIR / "scans" / f"{key}.png"
+    try:
+        if time.time() - path.stat().st_mtime <= ttl:
+            return path
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def store_scan(key: str, image) -> None:
+    """Remember a scanned PIL image as the latest scan for key"""
+    path = CACHE_DIR / "scans" / f"{key}.png"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    image.save(tmp_path, "PNG", compress_level=1)
+    tmp_path.replace(path)
+
+
+def cached_split(key: str) -> Optional[List[Path]]:
+    """Return the cached split parts for key (sorted by part name), or None"""
+    split_dir = CACHE_DIR / "splits" / key
+    if not split_dir.is_dir():
+        return None
+    files = sorted(split_dir.iterdir())
+    if files:
+        # Mark as recently used, so pruning keeps it
+        split_dir.touch()
+    return files or None
+
+
+def store_split(key: str, parts: Dict[str, Path]) -> None:
+    """
+    Remember the files produced by a split.
+    
+    Args:
+        key: Cache key from file_key()
+        parts: Part name (e.g. "1_top_left.png") -> produced file
+    """
+    split_dir = CACHE_DIR / "splits" / key
+    if split_dir.exists():
+        return
+    
+    # Fill a temporary directory first so an interrupted copy is never a hit
+    tmp_dir = split_dir.with_name(f"{key}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name, f in parts.items():
+        shutil.copyfile(f, tmp_dir / name)
+    tmp_dir.rename(split_dir)
+    
+    prune_splits()
+
+
+def prune_splits() -> None:
+    """Drop split entries older than SPLIT_MAX_AGE and all but the newest SPLIT_MAX_ENTRIES"""
+    splits_dir = CACHE_DIR / "splits"
+    entries = []
+    for entry in splits_dir.iterdir():
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except FileNotFoundError:
+            pass  # Removed by a concurrent prune
+    entries.sort(reverse=True)
+    
+    cutoff = time.time() - SPLIT_MAX_AGE
+    kept = 0
+    for mtime, entry in entries:
+        if mtime < cutoff:
+            shutil.rmtree(entry, ignore_errors=True)
+        elif entry.suffix != ".tmp":  # Another split may still be filling it
+            kept += 1
+            if kept > SPLIT_MAX_ENTRIES:
+                shutil.rmtree(entry, ignore_errors=True)
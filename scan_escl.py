@@ -11,6 +11,7 @@ import urllib3
 from xml.etree import ElementTree as ET
 from datetime import datetime
 from pathlib import Path
+import shutil
 import sys
 
 # Disable SSL warnings
@@ -18,6 +19,11 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 SCANNER_URL = "https://EPSON3BA687.local:443/eSCL"
 
+# Keep-alive session: the connectivity check, job POST and document GET
+# share one TLS connection
+session = requests.Session()
+session.verify = False
+
 
 def scan_with_escl(output_path="scan.jpg", color_mode="RGB24", resolution=300):
     """
@@ -60,11 +66,10 @@ def scan_with_escl(output_path="scan.jpg", color_mode="RGB24", resolution=300):
     try:
         # POST scan job
         print("Starting scan job...")
-        response = requests.post(
+        response = session.post(
             f"{SCANNER_URL}/ScanJobs",
             data=scan_settings,
             headers={'Content-Type': 'text/xml'},
-            verify=False,
             timeout=10
         )
         
@@ -88,36 +93,38 @@ def scan_with_escl(output_path="scan.jpg", color_mode="RGB24", resolution=300):
         doc_url = f"{job_url}/NextDocument"
         print(f"Retrieving document from: {doc_url}")
         
-        response = requests.get(
+        with session.get(
             doc_url,
-            verify=False,
-            timeout=120  # 2 minute timeout for scan
-        )
-        
-        if response.status_code == 200:
-            # Save the image
-            output_file = Path(output_path)
-            output_file.write_bytes(response.content)
-            
-            size_mb = len(response.content) / 1024 / 1024
-            print()
-            print("✓ Scan complete!")
-            print(f"  Saved to: {output_file.absolute()}")
-            print(f"  Size: {size_mb:.2f} MB")
+            timeout=120,  # 2 minute timeout for scan
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                print(f"✗ Failed to get document: HTTP {response.status_code}")
+                return None
             
-            return output_file
-        else:
-            print(f"✗ Failed to get document: HTTP {response.status_code}")
-            return None
+            # Save the image, streamed to disk in 1 MiB blocks
+            output_file = Path(output_path)
+            response.raw.decode_content = True
+            with output_file.open("wb", buffering=1 << 20) as f:
+                shutil.copyfileobj(response.raw, f, length=1 << 20)
+        
+        size_mb = output_file.stat().st_size / 1024 / 1024
+        print()
+        print("✓ Scan complete!")
+        print(f"  Saved to: {output_file.absolute()}")
+        print(f"  Size: {size_mb:.2f} MB")
+        
+        return output_file
             
     except requests.exceptions.Timeout:
         print("✗ Scan timed out")
         print("  Scanner may be in standby mode - try pressing a button")
         return None
+    except requests.exceptions.ConnectionError:
+        # Let the caller explain how to make the scanner reachable
+        raise
     except Exception as e:
         print(f"✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
         return None
 
 
@@ -132,21 +139,15 @@ def main():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = f"scan_{timestamp}.jpg"
     
-    # Test scanner connectivity first
-    print("Testing scanner connectivity...")
+    # Scan! No separate connectivity check: the job POST is the first
+    # request, and a connection failure there gets the same hints
     try:
-        response = requests.get(
-            f"{SCANNER_URL}/ScannerCapabilities",
-            verify=False,
-            timeout=5
+        result = scan_with_escl(
+            output_path=output_path,
+            color_mode="RGB24",  # Color scan
+            resolution=300       # 300 DPI
         )
-        if response.status_code == 200:
-            print("✓ Scanner is online and ready")
-            print()
-        else:
-            print(f"✗ Scanner returned HTTP {response.status_code}")
-            sys.exit(1)
-    except Exception as e:
+    except requests.exceptions.ConnectionError as e:
         print(f"✗ Cannot reach scanner: {e}")
         print()
         print("Make sure:")
@@ -155,13 +156,6 @@ def main():
         print("  3. You can ping EPSON3BA687.local")
         sys.exit(1)
     
-    # Scan!
-    result = scan_with_escl(
-        output_path=output_path,
-        color_mode="RGB24",  # Color scan
-        resolution=300       # 300 DPI
-    )
-    
     if result:
         print()
         print("✓ Success! Scanner is working with eSCL protocol!")
@@ -0,0 +1,111 @@
+"""
+Single-pass 2x2 split and content-bounds kernels (optional, need numba)
+
+poc_split normally cuts the decoded scan into views and lets each encoder
+read its quadrant directly. imagecodecs' PNG encoder needs C-contiguous
+input, though, so every view would otherwise be copied separately. This
+kernel reads the scan once and writes all four contiguous quadrants in the
+same pass, in parallel over rows.
+
+Edges match poc_split.grid_tiles(): the bottom row and right column take
+the remainder when the size is odd.
+
+content_bounds() serves smart_split.refine_photo_bounds: it walks in from
+each edge and stops at the first content pixel, so the white margins are
+all it reads instead of the whole region.
+"""
+
+import numpy as np
+
+# Optional: without numba, split2x2 and content_bounds are None and
+# callers keep using their NumPy code
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _content_bounds(gray, threshold):
+    """
+    First/last row and column holding a pixel <= threshold, as
+    (top, bottom, left, right); all -1 if there is none.
+    """
+    height, width = gray.shape
+    top = -1
+    for y in range(height):
+        for x in range(width):
+            if gray[y, x] <= threshold:
+                top = y
+                break
+        if top >= 0:
+            break
+    if top < 0:
+        return -1, -1, -1, -1
+    
+    bottom = top
+    for y in range(height - 1, top, -1):
+        for x in range(width):
+            if gray[y, x] <= threshold:
+                bottom = y
+                break
+        if bottom > top:
+            break
+    
+    # Columns only need checking between the content rows
+    left = -1
+    for x in range(width):
+        for y in range(top, bottom + 1):
+            if gray[y, x] <= threshold:
+                left = x
+                break
+        if left >= 0:
+            break
+    
+    right = left
+    for x in range(width - 1, left, -1):
+        for y in range(top, bottom + 1):
+            if gray[y, x] <= threshold:
+                right = x
+                break
+        if right > left:
+            break
+    
+    return top, bottom, left, right
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _split2x2(src, q1, q2, q3, q4):
+        height, width = src.shape[0], src.shape[1]
+        mh, mw = height // 2, width // 2
+        for y in numba.prange(height):
+            if y < mh:
+                q1[y] = src[y, :mw]
+                q2[y] = src[y, mw:]
+            else:
+                q3[y - mh] = src[y, :mw]
+                q4[y - mh] = src[y, mw:]
+
+    content_bounds = numba.njit(cache=True, boundscheck=False)(_content_bounds)
+    
+    def split2x2(src):
+        """
+        Copy a uint8 image array into four C-contiguous quadrants.
+
+        Returns:
+            (top_left, top_right, bottom_left, bottom_right)
+        """
+        height, width = src.shape[:2]
+        mh, mw = height // 2, width // 2
+        rest = src.shape[2:]
+        quadrants = (
+            np.empty((mh, mw) + rest, np.uint8),
+            np.empty((mh, width - mw) + rest, np.uint8),
+            np.empty((height - mh, mw) + rest, np.uint8),
+            np.empty((height - mh, width - mw) + rest, np.uint8),
+        )
+        _split2x2(src, *quadrants)
+        return quadrants
+else:
+    split2x2 = None
+    content_bounds = None
@@ -8,16 +8,65 @@ If NAPS2 works, this should work too since both use SANE backend.
 
 import subprocess
 import sys
+import tempfile
 from datetime import datetime
 from pathlib import Path
 
 
-def scan_with_scanimage(output_path="scanned_document.png", device="epson2:net:192.168.1.208"):
+def _run_with_pnmtopng(cmd, output_path, timeout=120):
+    """
+    Run scanimage with PNM output piped through pnmtopng -compression 1.
+    
+    pnmtopng encodes while scanimage is still reading from the scanner,
+    and level-1 deflate is much cheaper than scanimage's own PNG encoder.
+    
+    Returns:
+        (returncode, stderr text) of the first failing process
+    """
+    # scanimage's stderr goes to a file: nobody reads it until pnmtopng is
+    # done, and a full pipe would block scanimage (and the whole pipeline)
+    with open(output_path, 'wb') as f, tempfile.TemporaryFile() as scan_stderr:
+        scan = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=scan_stderr)
+        try:
+            encode = subprocess.Popen(['pnmtopng', '-compression', '1'], stdin=scan.stdout,
+                                      stdout=f, stderr=subprocess.PIPE)
+        except OSError:
+            scan.kill()
+            scan.wait()
+            raise
+        scan.stdout.close()  # pnmtopng owns the pipe now
+        try:
+            _, encode_err = encode.communicate(timeout=timeout)
+            scan.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            scan.kill()
+            encode.kill()
+            raise
+        scan_stderr.seek(0)
+        scan_err = scan_stderr.read()
+    
+    if scan.returncode != 0:
+        return scan.returncode, scan_err.decode(errors='replace')
+    return encode.returncode, encode_err.decode(errors='replace')
+
+
+def scan_with_scanimage(output_path="scanned_document.png", device="epson2:net:192.168.1.208",
+                        use_stdout=False, format="png", use_pnmtopng=False):
     """
     Scan using scanimage command directly.
     
     This is more reliable than python-sane for network scanners
     that may have timing/initialization issues.
+    
+    Args:
+        output_path: Where to save the PNG
+        device: SANE device name
+        use_stdout: Don't pass -o; scanimage writes the PNG to its stdout,
+            which is the output file itself (for scanimage builds without -o)
+        format: "png" or "jpeg" (much faster to encode, lossy)
+        use_pnmtopng: For PNG, let scanimage emit PNM and encode it with
+            pnmtopng -compression 1 in a pipeline (needs netpbm)
     """
     print("=" * 60)
     print("Scanning with scanimage command")
@@ -28,15 +77,18 @@ def scan_with_scanimage(output_path="scanned_document.png", device="epson2:net:1
     print(f"Output: {output_path}")
     print()
     
+    piped = use_pnmtopng and format == "png"
+    
     # Build scanimage command
     cmd = [
         'scanimage',
         '-d', device,
-        '--format=png',
+        f'--format={"pnm" if piped else format}',
         '--mode', 'Color',
         '--resolution', '300',
-        '-o', output_path
     ]
+    if not use_stdout and not piped:
+        cmd += ['-o', output_path]
     
     print("Command:", ' '.join(cmd))
     print()
@@ -45,13 +97,30 @@ def scan_with_scanimage(output_path="scanned_document.png", device="epson2:net:1
     print()
     
     try:
-        # Run scanimage
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120  # 2 minute timeout
-        )
+        # Run scanimage; only stderr is read back (for error messages),
+        # the image goes straight from scanimage to the file
+        if piped:
+            returncode, stderr = _run_with_pnmtopng(cmd, output_path)
+            result = subprocess.CompletedProcess(cmd, returncode, stderr=stderr)
+        elif use_stdout:
+            with open(output_path, 'wb') as f:
+                result = subprocess.run(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=f,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    timeout=120  # 2 minute timeout
+                )
+        else:
+            result = subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=120  # 2 minute timeout
+            )
         
         if result.returncode == 0:
             output_file = Path(output_path)
@@ -65,7 +134,7 @@ def scan_with_scanimage(output_path="scanned_document.png", device="epson2:net:1
                 print(f"✗ Command succeeded but file not found: {output_path}")
                 return None
         else:
-            print(f"✗ scanimage failed with code {result.returncode}")
+            print(f"✗ {'scanimage | pnmtopng' if piped else 'scanimage'} failed with code {result.returncode}")
             if result.stderr:
                 print(f"Error: {result.stderr}")
             return None
@@ -75,9 +144,13 @@ def scan_with_scanimage(output_path="scanned_document.png", device="epson2:net:1
         print("   Scanner may be in standby mode")
         return None
         
-    except FileNotFoundError:
-        print("✗ scanimage command not found!")
-        print("   Install with: brew install sane-backends")
+    except FileNotFoundError as e:
+        if e.filename == 'pnmtopng':
+            print("✗ pnmtopng command not found!")
+            print("   Install with: brew install netpbm")
+        else:
+            print("✗ scanimage command not found!")
+            print("   Install with: brew install sane-backends")
         return None
         
     except Exception as e:
@@ -92,13 +165,18 @@ def main():
     print("=" * 60)
     print()
     
+    # --jpeg: let scanimage write JPEG; --pnmtopng: PNG via a pnmtopng pipeline
+    format = "jpeg" if "--jpeg" in sys.argv else "png"
+    use_pnmtopng = "--pnmtopng" in sys.argv
+    
     # Generate output filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"scan_{timestamp}.png"
+    output_path = f"scan_{timestamp}.{'jpg' if format == 'jpeg' else 'png'}"
     
     # Check if scanimage is available
     try:
-        result = subprocess.run(['scanimage', '--version'], capture_output=True)
+        result = subprocess.run(['scanimage', '--version'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         if result.returncode != 0:
             print("✗ scanimage not available")
             print("Install with: brew install sane-backends")
@@ -125,7 +203,7 @@ def main():
     print()
     
     # Scan
-    scan_with_scanimage(output_path)
+    scan_with_scanimage(output_path, format=format, use_pnmtopng=use_pnmtopng)
 
 
 if __name__ == "__main__":
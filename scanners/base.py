@@ -4,12 +4,29 @@ Base scanner driver interface
 All scanner drivers must implement this interface.
 """
 
+import io
+import os
+import shutil
+import tempfile
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, List
 from enum import Enum
 
+import numpy as np
+from PIL import Image
+
+# Optional: imagecodecs' PNG encoder with a fixed row filter (see encode_png)
+try:
+    import imagecodecs
+except ImportError:
+    imagecodecs = None
+
+# Temporary scans go to RAM-backed /dev/shm where there is one (Linux)
+TEMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
 
 class ColorMode(Enum):
     """Scan color modes"""
@@ -18,9 +35,9 @@ class ColorMode(Enum):
     BLACK_WHITE = "bw"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ScanSettings:
-    """Scanner settings for a scan job"""
+    """Scanner settings for a scan job (immutable; copy with dataclasses.replace())"""
     resolution: int = 300  # DPI
     color_mode: ColorMode = ColorMode.COLOR
     format: str = "PNG"  # Output format (PNG, JPEG)
@@ -32,7 +49,7 @@ class ScanSettings:
     y_offset: Optional[float] = 0
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ScannerInfo:
     """Information about a detected scanner"""
     id: str  # Unique identifier
@@ -84,6 +101,58 @@ class ScannerDriver(ABC):
         """
         pass
     
+    def scan_to_memory(
+        self,
+        scanner_id: str,
+        settings: Optional[ScanSettings] = None
+    ) -> Image.Image:
+        """
+        Scan a document and return the image without keeping a file.
+        
+        Drivers that receive the image in memory should override this.
+        The default scans to a temporary file (in TEMP_DIR) and loads it back.
+        
+        Args:
+            scanner_id: Scanner identifier from list_scanners()
+            settings: Scan settings (resolution, color mode, etc.)
+        
+        Returns:
+            Scanned PIL image
+        """
+        with tempfile.TemporaryDirectory(dir=TEMP_DIR) as tmp_dir:
+            result = self.scan(scanner_id, Path(tmp_dir) / "scan.png", settings)
+            with Image.open(result) as image:
+                image.load()
+                return image
+    
+    def save_image(
+        self,
+        image: Image.Image,
+        output_path: Path,
+        settings: Optional[ScanSettings] = None
+    ) -> Path:
+        """
+        Save a scanned image in the format requested by the settings.
+        
+        JPEG scans get a .jpg suffix and quality 92; PNG uses fast
+        deflate (compress_level=1), which is still lossless.
+        
+        Returns:
+            Path the image was written to
+        """
+        if settings is None:
+            settings = ScanSettings()
+        
+        return save_image(image, output_path, settings.format)
+    
+    def close(self):
+        """Release connections or device handles held by the driver"""
+        pass
+    
+    def invalidate_cache(self):
+        """Forget any cached device list, so the next listing probes again"""
+        pass
+    
     @abstractmethod
     def is_available(self) -> bool:
         """
@@ -105,6 +174,109 @@ class ScannerDriver(ABC):
         pass
 
 
+def encode_png(arr: np.ndarray):
+    """
+    Encode a uint8 RGB or grayscale array as PNG at fast compression.
+    
+    With imagecodecs installed this uses a fixed SUB filter + RLE (OpenCV's
+    PNG defaults) instead of Pillow trying every row filter; otherwise
+    Pillow's encoder is used.
+    
+    Returns:
+        Encoded PNG data (bytes or a buffer)
+    """
+    if imagecodecs is not None and arr.dtype == np.uint8:
+        return imagecodecs.png_encode(np.ascontiguousarray(arr), level=1,
+                                      strategy=imagecodecs.PNG.STRATEGY.RLE,
+                                      filter=imagecodecs.PNG.FILTER.SUB)
+    buffer = io.BytesIO()
+    Image.fromarray(arr).save(buffer, "PNG", compress_level=1)
+    return buffer.getbuffer()
+
+
+def save_image(image: Image.Image, output_path: Path, format: str = "PNG") -> Path:
+    """
+    Encode an image in memory and publish it with a single rename.
+    
+    The file appears complete or not at all, so a reader listing the
+    directory (the web UI, poc_split) never picks up a half-written scan.
+    JPEG output gets a .jpg suffix.
+    
+    Returns:
+        Path the image was written to
+    """
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    if format.upper() in ("JPEG", "JPG"):
+        output_file = output_file.with_suffix(".jpg")
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=92, subsampling=2)
+        data = buffer.getbuffer()
+    elif image.mode in ("RGB", "L"):
+        data = encode_png(np.asarray(image))
+    else:
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG", compress_level=1)
+        data = buffer.getbuffer()
+    
+    return write_atomic(output_file, data)
+
+
+@contextmanager
+def _replace_on_success(output_file: Path, buffering: int = -1):
+    """Open a temporary sibling for writing; rename it over output_file on success"""
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    try:
+        with open(tmp_file, "wb", buffering=buffering) as f:
+            yield f
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_file, output_file)
+
+
+def write_atomic(output_path: Path, data) -> Path:
+    """Write bytes to a temporary sibling in one go, then rename it into place"""
+    output_file = Path(output_path)
+    with _replace_on_success(output_file) as f:
+        f.write(data)
+    return output_file
+
+
+def write_stream_atomic(output_path: Path, source, size: Optional[int] = None) -> Path:
+    """
+    Copy a readable binary stream (e.g. a download) to a temporary sibling,
+    then rename it into place.
+    
+    shutil.copyfileobj runs the read/write loop in 1 MiB blocks through a
+    1 MiB file buffer, so a large scan takes few write() calls.
+    
+    Args:
+        size: Expected length (e.g. Content-Length); on Linux the file's
+            blocks are reserved up front instead of extended while copying
+    """
+    output_file = Path(output_path)
+    with _replace_on_success(output_file, buffering=1 << 20) as f:
+        preallocated = False
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                preallocated = True
+            except OSError:
+                pass  # Filesystem without fallocate support
+        
+        shutil.copyfileobj(source, f, length=1 << 20)
+        
+        if preallocated:
+            # Drop any reserved tail if the body was shorter than announced
+            f.flush()
+            f.truncate(f.tell())
+    return output_file
+
+
 class ScannerError(Exception):
     """Base exception for scanner errors"""
     pass
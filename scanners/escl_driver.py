@@ -5,11 +5,31 @@ Uses HTTP-based eSCL protocol. Works on macOS, Linux, and Windows.
 This is what NAPS2 uses for "Apple driver" on macOS.
 """
 
+import io
+import time
 import requests
 import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
-from xml.etree import ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: lxml parses capability documents in libxml2; the stdlib
+# parser has the same find() API and is used when lxml is missing
+try:
+    from lxml import etree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+# Optional: with zeroconf, scanners are found from their mDNS
+# advertisements instead of probing the hardcoded URL list
+try:
+    from zeroconf import IPVersion, ServiceBrowser, Zeroconf
+except ImportError:
+    Zeroconf = None
 
 from .base import (
     ScannerDriver,
@@ -19,11 +39,83 @@ from .base import (
     ScannerError,
     ScannerNotFoundError,
     ScannerIOError,
+    save_image,
+    write_stream_atomic,
 )
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+ESCL_NS = {'scan': 'http://schemas.hp.com/imaging/escl/2011/05/03'}
+
+# Qualified tags for iter(); no path or prefix to resolve per lookup
+ESCL_MAKE_TAG = f"{{{ESCL_NS['scan']}}}Make"
+ESCL_MODEL_TAG = f"{{{ESCL_NS['scan']}}}Model"
+
+# Map color mode to eSCL
+ESCL_COLOR_MODES = {
+    ColorMode.COLOR: b"RGB24",
+    ColorMode.GRAYSCALE: b"Grayscale8",
+    ColorMode.BLACK_WHITE: b"BlackAndWhite1",
+}
+
+# A4+ dimensions in 1/300ths of an inch
+# A4 = 210mm x 297mm = 8.27" x 11.69"
+# Using 8.77" width (0.5" wider than A4) for better coverage
+DEFAULT_WIDTH_300THS = int(8.77 * 300)
+DEFAULT_HEIGHT_300THS = int(11.69 * 300)
+
+# Output suffix -> format the caller wants from ESCLDriver.scan()
+OUTPUT_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+
+# mDNS service types advertised by eSCL scanners -> URL scheme
+ESCL_SERVICE_TYPES = {
+    "_uscan._tcp.local.": "http",
+    "_uscans._tcp.local.": "https",
+}
+
+# Scan job document; only the numbers and color mode change between jobs.
+# Every field is an integer (%d) or a fixed color-mode token (%b), so
+# nothing needs XML escaping.
+SCAN_SETTINGS_TEMPLATE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<scan:ScanSettings xmlns:scan="http://schemas.hp.com/imaging/escl/2011/05/03" xmlns:pwg="http://www.pwg.org/schemas/2010/12/sm">
+    <pwg:Version>2.0</pwg:Version>
+    <pwg:ScanRegions>
+        <pwg:ScanRegion>
+            <pwg:ContentRegionUnits>escl:ThreeHundredthsOfInches</pwg:ContentRegionUnits>
+            <pwg:XOffset>%(x)d</pwg:XOffset>
+            <pwg:YOffset>%(y)d</pwg:YOffset>
+            <pwg:Width>%(width)d</pwg:Width>
+            <pwg:Height>%(height)d</pwg:Height>
+        </pwg:ScanRegion>
+    </pwg:ScanRegions>
+    <scan:InputSource>Platen</scan:InputSource>
+    <scan:ColorMode>%(color_mode)b</scan:ColorMode>
+    <scan:XResolution>%(resolution)d</scan:XResolution>
+    <scan:YResolution>%(resolution)d</scan:YResolution>
+</scan:ScanSettings>"""
+
+
+class _ServiceCollector:
+    """Zeroconf listener keeping service name -> eSCL URL up to date"""
+    
+    def __init__(self):
+        self.urls: Dict[str, str] = {}
+    
+    def add_service(self, zc, type_, name):
+        info = zc.get_service_info(type_, name, timeout=2000)
+        if info is None or not info.port:
+            return
+        addresses = info.parsed_addresses(IPVersion.V4Only)
+        host = addresses[0] if addresses else info.server.rstrip('.')
+        resource = (info.properties.get(b'rs') or b'eSCL').decode(errors='ignore').strip('/')
+        self.urls[name] = f"{ESCL_SERVICE_TYPES[type_]}://{host}:{info.port}/{resource}"
+    
+    update_service = add_service
+    
+    def remove_service(self, zc, type_, name):
+        self.urls.pop(name, None)
+
 
 class ESCLDriver(ScannerDriver):
     """
@@ -32,9 +124,82 @@ class ESCLDriver(ScannerDriver):
     Uses HTTP-based protocol to communicate with network scanners.
     """
     
+    # How long a scanner's capabilities are reused (seconds) before asking
+    # the scanner again (with If-None-Match, so an unchanged document is a 304)
+    CAPABILITIES_CACHE_TTL = 30
+    
+    # Busy or waking scanners answer 409/503 for a moment; those requests
+    # are retried with backoff (0.5 s, 1 s, 2 s). Other statuses and
+    # connection/read errors are not retried: an offline scanner should fail
+    # fast, and a POST that reached the scanner (a 500 can come back after
+    # the job was created) must not create a second job.
+    RETRY = Retry(
+        total=3,
+        connect=0,
+        read=0,
+        status=3,
+        backoff_factor=0.5,
+        status_forcelist=[409, 503],
+        allowed_methods={'GET', 'POST', 'DELETE'},
+        raise_on_status=False,
+    )
+    
+    # While the document is not ready (202/503), poll NextDocument this often
+    DOCUMENT_POLL_INTERVAL = 1.0
+    
+    # On the first listing, wait this long for mDNS answers (seconds); later
+    # listings read the advertisements collected in the background
+    DISCOVERY_WAIT = 2.0
+    
     def __init__(self):
         self.timeout = 10  # Default timeout for HTTP requests
         self.scan_timeout = 120  # Timeout for actual scanning
+        
+        # Scanners to probe when mDNS finds none (or zeroconf is not installed)
+        self.scanner_urls = ["https://EPSON3BA687.local:443/eSCL"]
+        
+        # mDNS browser, started on the first list_scanners() call
+        self._zeroconf = None
+        self._services = _ServiceCollector()
+        
+        # Scanner URL -> (probed at, scanner info, ETag of its capabilities)
+        self._capabilities: Dict[str, Tuple[float, ScannerInfo, Optional[str]]] = {}
+        
+        # One keep-alive session, so the TLS handshake with the scanner
+        # is done once rather than for every capabilities/job/document call
+        self.session = requests.Session()
+        self.session.verify = False  # Scanners use self-signed certificates
+        # Scanners are on the LAN: skip requests' per-request proxy
+        # environment and ~/.netrc lookups
+        self.session.trust_env = False
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=self.RETRY)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # NextDocument answers 202/503 until the page is scanned; the poll
+        # loop in _run_job handles that, so these GETs go through a session
+        # without status retries (no hidden backoff on top of the poll)
+        self._poll_session = requests.Session()
+        self._poll_session.verify = False
+        self._poll_session.trust_env = False
+        poll_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self._poll_session.mount("https://", poll_adapter)
+        self._poll_session.mount("http://", poll_adapter)
+    
+    def close(self):
+        """Close the pooled scanner connections and stop mDNS browsing"""
+        self.session.close()
+        self._poll_session.close()
+        if self._zeroconf is not None:
+            self._zeroconf.close()
+            self._zeroconf = None
+    
+    def invalidate_cache(self, scanner_url: Optional[str] = None):
+        """Forget cached capabilities (of one scanner, or all of them)"""
+        if scanner_url is None:
+            self._capabilities.clear()
+        else:
+            self._capabilities.pop(scanner_url, None)
     
     def get_driver_name(self) -> str:
         return "eSCL"
@@ -51,29 +216,69 @@ class ESCLDriver(ScannerDriver):
         """
         Discover eSCL scanners via mDNS/Bonjour.
         
-        For now, returns known scanner. Future: implement mDNS discovery.
+        Only scanners advertising _uscan/_uscans are probed; without
+        zeroconf, or when nothing is advertised, the known scanner_urls are.
         """
-        # TODO: Implement proper mDNS discovery using zeroconf library
-        # For now, return the known Epson scanner
+        urls = self._discovered_urls() or self.scanner_urls
+        if len(urls) == 1:
+            found = [self._probe(urls[0])]
+        else:
+            # Each probe waits up to 5 s; run them side by side
+            with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as pool:
+                found = list(pool.map(self._probe, urls))
         
-        scanners = []
+        return [scanner for scanner in found if scanner is not None]
+    
+    def _discovered_urls(self) -> List[str]:
+        """eSCL URLs currently advertised over mDNS (empty without zeroconf)"""
+        if Zeroconf is None:
+            return []
+        
+        if self._zeroconf is None:
+            try:
+                self._zeroconf = Zeroconf()
+                ServiceBrowser(self._zeroconf, list(ESCL_SERVICE_TYPES), self._services)
+            except OSError:
+                # No multicast-capable interface
+                self._zeroconf = None
+                return []
+            time.sleep(self.DISCOVERY_WAIT)
+        
+        return sorted(set(self._services.urls.values()))
+    
+    def _probe(self, scanner_url: str) -> Optional[ScannerInfo]:
+        """
+        Fetch one scanner's capabilities; None if it does not answer.
+        
+        Results are reused for CAPABILITIES_CACHE_TTL seconds.
+        """
+        now = time.monotonic()
+        cached = self._capabilities.get(scanner_url)
+        if cached and now - cached[0] < self.CAPABILITIES_CACHE_TTL:
+            return cached[1]
+        
+        headers = {}
+        if cached and cached[2]:
+            headers['If-None-Match'] = cached[2]
         
-        # Try known scanner
-        scanner_url = "https://EPSON3BA687.local:443/eSCL"
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{scanner_url}/ScannerCapabilities",
-                verify=False,
+                headers=headers,
                 timeout=5
             )
             
+            if response.status_code == 304 and cached:
+                # Unchanged since the last probe; no need to parse it again
+                self._capabilities[scanner_url] = (now, cached[1], cached[2])
+                return cached[1]
+            
             if response.status_code == 200:
                 # Parse scanner info from capabilities
                 root = ET.fromstring(response.content)
-                ns = {'scan': 'http://schemas.hp.com/imaging/escl/2011/05/03'}
                 
-                make = root.find('.//scan:Make', ns)
-                model = root.find('.//scan:Model', ns)
+                make = next(root.iter(ESCL_MAKE_TAG), None)
+                model = next(root.iter(ESCL_MODEL_TAG), None)
                 
                 scanner_info = ScannerInfo(
                     id=scanner_url,
@@ -83,72 +288,52 @@ class ESCLDriver(ScannerDriver):
                     model=model.text if model is not None else None,
                     connection="network"
                 )
-                scanners.append(scanner_info)
+                self._capabilities[scanner_url] = (now, scanner_info, response.headers.get('ETag'))
+                return scanner_info
         except Exception:
             # Scanner not available or not responding
             pass
         
-        return scanners
+        self._capabilities.pop(scanner_url, None)
+        return None
     
-    def scan(
-        self,
-        scanner_id: str,
-        output_path: Path,
-        settings: Optional[ScanSettings] = None
-    ) -> Path:
+    def _scan_settings_xml(self, settings: ScanSettings) -> bytes:
+        """Build the eSCL ScanSettings document for a job"""
+        def to_300ths(mm):
+            return int(mm * 300 / 25.4)
+        
+        return SCAN_SETTINGS_TEMPLATE % {
+            b'x': to_300ths(settings.x_offset) if settings.x_offset else 0,
+            b'y': to_300ths(settings.y_offset) if settings.y_offset else 0,
+            b'width': DEFAULT_WIDTH_300THS if settings.width is None else to_300ths(settings.width),
+            b'height': DEFAULT_HEIGHT_300THS if settings.height is None else to_300ths(settings.height),
+            b'color_mode': ESCL_COLOR_MODES.get(settings.color_mode, b"RGB24"),
+            b'resolution': settings.resolution,
+        }
+    
+    def _run_job(self, scanner_id: str, settings: Optional[ScanSettings], handle_document,
+                 accept: str = "image/jpeg, image/png"):
         """
-        Scan using eSCL protocol.
+        Create a scan job, fetch its document and always delete the job.
         
         Args:
             scanner_id: eSCL URL (e.g., https://scanner.local:443/eSCL)
-            output_path: Where to save scan
             settings: Scan settings
-        
-        Returns:
-            Path to saved scan
+            handle_document: Called with the streaming NextDocument response
+                and its lowercased content type; its result is returned
+            accept: Accept header for the document, preferred type first
         """
         if settings is None:
             settings = ScanSettings()
         
-        # Map color mode to eSCL
-        escl_color_mode = {
-            ColorMode.COLOR: "RGB24",
-            ColorMode.GRAYSCALE: "Grayscale8",
-            ColorMode.BLACK_WHITE: "BlackAndWhite1"
-        }.get(settings.color_mode, "RGB24")
-        
-        # A4+ dimensions in 1/300ths of an inch
-        # A4 = 210mm x 297mm = 8.27" x 11.69"
-        # Using 8.77" width (0.5" wider than A4) for better coverage
-        width_300ths = int(8.77 * 300) if settings.width is None else int(settings.width / 25.4 * 300)
-        height_300ths = int(11.69 * 300) if settings.height is None else int(settings.height / 25.4 * 300)
-        
-        # Create scan settings XML
-        scan_settings_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<scan:ScanSettings xmlns:scan="http://schemas.hp.com/imaging/escl/2011/05/03" xmlns:pwg="http://www.pwg.org/schemas/2010/12/sm">
-    <pwg:Version>2.0</pwg:Version>
-    <pwg:ScanRegions>
-        <pwg:ScanRegion>
-            <pwg:ContentRegionUnits>escl:ThreeHundredthsOfInches</pwg:ContentRegionUnits>
-            <pwg:XOffset>{int(settings.x_offset / 25.4 * 300) if settings.x_offset else 0}</pwg:XOffset>
-            <pwg:YOffset>{int(settings.y_offset / 25.4 * 300) if settings.y_offset else 0}</pwg:YOffset>
-            <pwg:Width>{width_300ths}</pwg:Width>
-            <pwg:Height>{height_300ths}</pwg:Height>
-        </pwg:ScanRegion>
-    </pwg:ScanRegions>
-    <scan:InputSource>Platen</scan:InputSource>
-    <scan:ColorMode>{escl_color_mode}</scan:ColorMode>
-    <scan:XResolution>{settings.resolution}</scan:XResolution>
-    <scan:YResolution>{settings.resolution}</scan:YResolution>
-</scan:ScanSettings>"""
+        scan_settings_xml = self._scan_settings_xml(settings)
         
         try:
             # POST scan job
-            response = requests.post(
+            response = self.session.post(
                 f"{scanner_id}/ScanJobs",
                 data=scan_settings_xml,
                 headers={'Content-Type': 'text/xml'},
-                verify=False,
                 timeout=self.timeout
             )
             
@@ -160,75 +345,186 @@ class ESCLDriver(ScannerDriver):
             if not job_url:
                 raise ScannerIOError("No job location in response")
             
-            # Get the scanned document
-            doc_url = f"{job_url}/NextDocument"
-            response = requests.get(
-                doc_url,
-                verify=False,
-                timeout=self.scan_timeout
-            )
-            
-            if response.status_code != 200:
-                # Clean up job before raising error
-                try:
-                    requests.delete(job_url, verify=False, timeout=5)
-                except:
-                    pass
-                raise ScannerIOError(f"Failed to get document: HTTP {response.status_code}")
-            
-            # Check content type and convert if needed
-            content_type = response.headers.get('Content-Type', '').lower()
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
             try:
-                # If scanner returns PDF or JPEG, convert to PNG if requested
-                if 'pdf' in content_type and str(output_file).lower().endswith('.png'):
-                    # Convert PDF to PNG
-                    try:
-                        from PIL import Image
-                        import io
-                        from pdf2image import convert_from_bytes
-                        
-                        # Convert PDF to images (usually just one page for scanner)
-                        images = convert_from_bytes(response.content)
-                        if images:
-                            images[0].save(output_file, 'PNG')
-                        else:
-                            raise ScannerError("PDF conversion resulted in no images")
-                    except ImportError:
-                        # pdf2image not available, save as-is but warn
-                        raise ScannerError(
-                            "Scanner returned PDF but pdf2image not installed. "
-                            "Install with: uv add pdf2image pillow"
-                        )
-                elif 'jpeg' in content_type or 'jpg' in content_type:
-                    # If scanner returns JPEG, convert to PNG if needed
-                    if str(output_file).lower().endswith('.png'):
-                        from PIL import Image
-                        import io
-                        
-                        image = Image.open(io.BytesIO(response.content))
-                        image.save(output_file, 'PNG')
-                    else:
-                        output_file.write_bytes(response.content)
-                else:
-                    # Save as-is
-                    output_file.write_bytes(response.content)
+                # Get the scanned document; streamed so a document already in
+                # the wanted format can go to disk without being held in memory
+                doc_url = f"{job_url}/NextDocument"
+                deadline = time.monotonic() + self.scan_timeout
+                while True:
+                    response = self._poll_session.get(
+                        doc_url,
+                        headers={'Accept': accept},
+                        timeout=self.scan_timeout,
+                        stream=True
+                    )
+                    if response.status_code not in (202, 503) or time.monotonic() >= deadline:
+                        break
+                    # Still scanning; ask again instead of failing the job
+                    response.close()
+                    time.sleep(self.DOCUMENT_POLL_INTERVAL)
+                
+                with response:
+                    if response.status_code != 200:
+                        raise ScannerIOError(f"Failed to get document: HTTP {response.status_code}")
+                    
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    return handle_document(response, content_type)
             finally:
                 # Always delete the scan job to clean up and reset scanner state
                 try:
-                    requests.delete(job_url, verify=False, timeout=5)
+                    self.session.delete(job_url, timeout=5)
                 except:
                     pass  # Ignore errors during cleanup
             
-            return output_file
-            
         except requests.exceptions.Timeout:
             raise ScannerIOError("Scan timed out - scanner may be in standby mode")
         except requests.exceptions.ConnectionError:
+            self.invalidate_cache(scanner_id)  # Probe it again next time
             raise ScannerNotFoundError(f"Cannot connect to scanner at {scanner_id}")
         except Exception as e:
             if isinstance(e, ScannerError):
                 raise
             raise ScannerError(f"Scan failed: {e}")
+    
+    @staticmethod
+    def _decode_body(response) -> Image.Image:
+        """
+        Read the whole document body and decode it.
+        
+        Pillow's ImageFile.Parser has no incremental JPEG/PNG decoder; it
+        only concatenates the chunks and decodes in close(), so one read
+        into Image.open() is faster.
+        """
+        image = Image.open(io.BytesIO(response.content))
+        image.load()
+        return image
+    
+    @staticmethod
+    def _convert_from_bytes():
+        """Import pdf2image's converter, with an install hint if it is missing"""
+        try:
+            from pdf2image import convert_from_bytes
+        except ImportError:
+            raise ScannerError(
+                "Scanner returned PDF but pdf2image not installed. "
+                "Install with: uv add pdf2image pillow"
+            )
+        return convert_from_bytes
+    
+    def _pdf_first_page(self, content: bytes, resolution: int) -> Image.Image:
+        """Render the first page of a PDF document at the scan resolution"""
+        convert_from_bytes = self._convert_from_bytes()
+        images = convert_from_bytes(content, dpi=resolution, first_page=1, last_page=1)
+        if not images:
+            raise ScannerError("PDF conversion resulted in no images")
+        return images[0]
+    
+    def _pdf_first_page_to_png(self, content: bytes, resolution: int, output_file: Path) -> Path:
+        """
+        Render the first page of a PDF straight to a PNG file.
+        
+        pdftocairo writes the file itself (PNG natively, no intermediate
+        PPM), so the page is never decoded into this process; it renders to
+        a temporary name that is then renamed.
+        """
+        convert_from_bytes = self._convert_from_bytes()
+        paths = convert_from_bytes(
+            content,
+            dpi=resolution,
+            first_page=1,
+            last_page=1,
+            fmt='png',
+            output_folder=str(output_file.parent),
+            output_file=f"{output_file.stem}.tmp",
+            single_file=True,
+            paths_only=True,
+            use_pdftocairo=True,
+        )
+        if not paths:
+            raise ScannerError("PDF conversion resulted in no images")
+        Path(paths[0]).replace(output_file)
+        return output_file
+    
+    def scan(
+        self,
+        scanner_id: str,
+        output_path: Path,
+        settings: Optional[ScanSettings] = None
+    ) -> Path:
+        """
+        Scan using eSCL protocol.
+        
+        Args:
+            scanner_id: eSCL URL (e.g., https://scanner.local:443/eSCL)
+            output_path: Where to save scan
+            settings: Scan settings
+        
+        Returns:
+            Path to saved scan
+        """
+        if settings is None:
+            settings = ScanSettings()
+        
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        # The output suffix says which format the caller wants (None = keep
+        # whatever the scanner sends)
+        wanted = OUTPUT_FORMATS.get(output_file.suffix.lower())
+        
+        def save_document(response, content_type):
+            if 'pdf' in content_type:
+                delivered = 'PDF'
+            elif 'jpeg' in content_type or 'jpg' in content_type:
+                delivered = 'JPEG'
+            elif 'png' in content_type:
+                delivered = 'PNG'
+            else:
+                delivered = None
+            
+            if wanted is None or delivered in (None, wanted):
+                # Already in the requested format: stream to disk as-is,
+                # so only one block is in memory and nothing is re-encoded
+                response.raw.decode_content = True  # Undo gzip, as iter_content would
+                # Content-Length is the encoded size; only trust it for a plain body
+                size = None
+                if not response.headers.get('Content-Encoding'):
+                    size = int(response.headers.get('Content-Length') or 0) or None
+                return write_stream_atomic(output_file, response.raw, size)
+            
+            # Convert only when the scanner sent a different format
+            if delivered == 'PDF' and wanted == 'PNG':
+                return self._pdf_first_page_to_png(response.content, settings.resolution, output_file)
+            elif delivered == 'PDF':
+                image = self._pdf_first_page(response.content, settings.resolution)
+            else:
+                image = self._decode_body(response)
+            return save_image(image, output_file, wanted)
+        
+        accept = "image/png, image/jpeg" if wanted == 'PNG' else "image/jpeg, image/png"
+        return self._run_job(scanner_id, settings, save_document, accept)
+    
+    def scan_to_memory(
+        self,
+        scanner_id: str,
+        settings: Optional[ScanSettings] = None
+    ) -> Image.Image:
+        """
+        Scan using eSCL protocol and decode the document in memory.
+        
+        Args:
+            scanner_id: eSCL URL (e.g., https://scanner.local:443/eSCL)
+            settings: Scan settings
+        
+        Returns:
+            Scanned PIL image
+        """
+        if settings is None:
+            settings = ScanSettings()
+        
+        def decode_document(response, content_type):
+            if 'pdf' in content_type:
+                return self._pdf_first_page(response.content, settings.resolution)
+            return self._decode_body(response)
+        
+        return self._run_job(scanner_id, settings, decode_document)
@@ -4,16 +4,23 @@ Scanner Manager
 Automatically detects and uses the best available scanner driver.
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
+from PIL import Image
+
 from .base import ScannerDriver, ScannerInfo, ScanSettings, ScannerError
 from .escl_driver import ESCLDriver
 from .sane_driver import SANEDriver
 from .wia_driver import WIADriver
 from .simulation_driver import SimulationDriver
 
+# Give up on drivers that have not listed their scanners after this many seconds
+LIST_TIMEOUT = 15
+
 
 class ScannerManager:
     """
@@ -34,28 +41,66 @@ class ScannerManager:
             WIADriver(),
             SimulationDriver(),
         ]
+        
+        # Availability only depends on installed libraries, so check it once
+        self._available_drivers = [driver for driver in self.drivers if driver.is_available()]
+        self._drivers_by_name = {driver.get_driver_name().lower(): driver for driver in self.drivers}
+        
+        # Errors from the last list_all_scanners() call, by driver name
+        self.driver_errors: Dict[str, Exception] = {}
+    
+    def close(self):
+        """Release resources held by all drivers"""
+        for driver in self.drivers:
+            driver.close()
+    
+    def invalidate_cache(self):
+        """Make the next listing probe every driver's devices again"""
+        for driver in self.drivers:
+            driver.invalidate_cache()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def get_available_drivers(self) -> List[ScannerDriver]:
         """Get list of available drivers on this system"""
-        return [driver for driver in self.drivers if driver.is_available()]
+        return list(self._available_drivers)
     
     def list_all_scanners(self) -> List[ScannerInfo]:
         """
         List all scanners from all available drivers.
         
+        Drivers are probed concurrently (each mostly waits on USB/network);
+        results keep the driver preference order. A driver still busy after
+        LIST_TIMEOUT seconds is skipped and reported in driver_errors.
+        
         Returns:
             List of ScannerInfo from all drivers
         """
+        drivers = self.get_available_drivers()
+        if not drivers:
+            return []
+        
+        pool = ThreadPoolExecutor(max_workers=len(drivers))
+        futures = [(driver, pool.submit(driver.list_scanners)) for driver in drivers]
+        # Don't wait for a hung driver; its thread finishes in the background
+        pool.shutdown(wait=False)
+        
+        deadline = time.monotonic() + LIST_TIMEOUT
         all_scanners = []
+        errors = {}
         
-        for driver in self.get_available_drivers():
+        for driver, future in futures:
             try:
-                scanners = driver.list_scanners()
-                all_scanners.extend(scanners)
-            except Exception:
-                # Driver failed to list scanners, skip it
-                continue
+                all_scanners.extend(future.result(timeout=max(0, deadline - time.monotonic())))
+            except Exception as e:
+                # Driver failed (or timed out) listing scanners, skip it
+                errors[driver.get_driver_name()] = e
         
+        self.driver_errors = errors
         return all_scanners
     
     def get_preferred_scanner(self) -> Optional[ScannerInfo]:
@@ -85,10 +130,7 @@ class ScannerManager:
         Returns:
             ScannerDriver instance or None
         """
-        for driver in self.drivers:
-            if driver.get_driver_name().lower() == scanner_info.driver.lower():
-                return driver
-        return None
+        return self._drivers_by_name.get(scanner_info.driver.lower())
     
     def scan(
         self,
@@ -129,49 +171,100 @@ class ScannerManager:
         # Perform scan
         return driver.scan(scanner_info.id, output_path, settings)
     
+    def scan_to_memory(
+        self,
+        scanner_info: Optional[ScannerInfo] = None,
+        settings: Optional[ScanSettings] = None
+    ) -> Image.Image:
+        """
+        Scan using the specified scanner and return the image in memory.
+        
+        Args:
+            scanner_info: Scanner to use (None = auto-select)
+            settings: Scan settings (None = use defaults)
+        
+        Returns:
+            Scanned PIL image
+        
+        Raises:
+            ScannerError: If scan fails or no scanner available
+        """
+        if scanner_info is None:
+            scanner_info = self.get_preferred_scanner()
+            if scanner_info is None:
+                raise ScannerError("No scanners available")
+        
+        driver = self.get_driver_for_scanner(scanner_info)
+        if driver is None:
+            raise ScannerError(f"No driver available for {scanner_info.driver}")
+        
+        return driver.scan_to_memory(scanner_info.id, settings)
+    
     def print_available_scanners(self):
         """Print information about available scanners"""
-        print("=" * 60)
-        print("Available Scanner Drivers")
-        print("=" * 60)
-        print()
+        # One write for the whole report, so it is not interleaved with
+        # output from other threads
+        print("\n".join(self._available_scanners_report()))
+    
+    def _available_scanners_report(self) -> List[str]:
+        """Lines of the report printed by print_available_scanners()"""
+        lines = [
+            "=" * 60,
+            "Available Scanner Drivers",
+            "=" * 60,
+            "",
+        ]
         
         available_drivers = self.get_available_drivers()
         
         if not available_drivers:
-            print("✗ No scanner drivers available!")
-            print("\nInstall:")
-            print("  macOS/Linux: brew install sane-backends && uv add python-sane")
-            print("  Windows: uv add pywin32")
-            return
+            lines += [
+                "✗ No scanner drivers available!",
+                "\nInstall:",
+                "  macOS/Linux: brew install sane-backends && uv add python-sane",
+                "  Windows: uv add pywin32",
+            ]
+            return lines
         
-        for driver in available_drivers:
-            print(f"✓ {driver.get_driver_name()} driver available")
+        scanners = self.list_all_scanners()
         
-        print()
-        print("=" * 60)
-        print("Detected Scanners")
-        print("=" * 60)
-        print()
+        for driver in available_drivers:
+            name = driver.get_driver_name()
+            if name in self.driver_errors:
+                lines.append(f"⚠ {name} driver available, listing failed: {self.driver_errors[name]}")
+            else:
+                lines.append(f"✓ {name} driver available")
         
-        scanners = self.list_all_scanners()
+        lines += [
+            "",
+            "=" * 60,
+            "Detected Scanners",
+            "=" * 60,
+            "",
+        ]
         
         if not scanners:
-            print("✗ No scanners found!")
-            print("\nMake sure:")
-            print("  - Scanner is powered on")
-            print("  - Scanner is connected (USB/network)")
-            print("  - Scanner drivers are installed")
-            return
+            lines += [
+                "✗ No scanners found!",
+                "\nMake sure:",
+                "  - Scanner is powered on",
+                "  - Scanner is connected (USB/network)",
+                "  - Scanner drivers are installed",
+            ]
+            return lines
         
         for i, scanner in enumerate(scanners, 1):
-            print(f"[{i}] {scanner.name}")
-            print(f"    Driver: {scanner.driver}")
-            print(f"    ID: {scanner.id}")
+            lines += [
+                f"[{i}] {scanner.name}",
+                f"    Driver: {scanner.driver}",
+                f"    ID: {scanner.id}",
+            ]
             if scanner.manufacturer:
-                print(f"    Manufacturer: {scanner.manufacturer}")
+                lines.append(f"    Manufacturer: {scanner.manufacturer}")
             if scanner.model:
-                print(f"    Model: {scanner.model}")
+                lines.append(f"    Model: {scanner.model}")
             if scanner.connection:
-                print(f"    Connection: {scanner.connection}")
-            print()
+                lines.append(f"    Connection: {scanner.connection}")
+            lines.append("")
+        
+        return lines
@@ -4,9 +4,15 @@ SANE scanner driver
 Uses SANE backend for scanning on Linux and macOS.
 """
 
+import random
+import threading
+import time
 from pathlib import Path
 from typing import List, Optional
 
+import numpy as np
+from PIL import Image
+
 from .base import (
     ScannerDriver,
     ScannerInfo,
@@ -26,9 +32,21 @@ class SANEDriver(ScannerDriver):
     Uses python-sane library to interface with SANE backends.
     """
     
+    # How long a device enumeration is reused (seconds); probing USB and
+    # network backends takes seconds, hot-plugged devices show up after this
+    DEVICE_CACHE_TTL = 300
+    
     def __init__(self):
         self._sane_available = False
         self._sane = None
+        self._devices = None
+        self._devices_at = 0.0
+        # (devices, ScannerInfo tuple) built from the last enumeration
+        self._scanner_infos = None
+        # sane.init() loads and starts every backend: do it once per driver,
+        # not for each listing and scan; close() undoes it
+        self._initialized = False
+        self._init_lock = threading.Lock()
         
         try:
             import sane
@@ -44,6 +62,58 @@ class SANEDriver(ScannerDriver):
         """SANE is available if python-sane is installed"""
         return self._sane_available
     
+    def invalidate_cache(self):
+        """Forget the cached device list"""
+        self._devices = None
+    
+    def close(self):
+        """Shut SANE down if this driver started it"""
+        with self._init_lock:
+            if self._initialized:
+                self._initialized = False
+                self._sane.exit()
+    
+    def _ensure_init(self):
+        """Run sane.init() unless it has already been run"""
+        with self._init_lock:
+            if not self._initialized:
+                self._sane.init()
+                self._initialized = True
+    
+    def _get_devices(self, force: bool = False):
+        """
+        Return sane.get_devices(), reusing the last result for DEVICE_CACHE_TTL.
+        
+        Args:
+            force: Probe again even if the cached list is still fresh
+        """
+        now = time.monotonic()
+        if force or self._devices is None or now - self._devices_at > self.DEVICE_CACHE_TTL:
+            self._ensure_init()
+            self._devices = self._sane.get_devices()
+            self._devices_at = now
+        return self._devices
+    
+    @staticmethod
+    def _snap(scanner) -> Image.Image:
+        """
+        Read the frame of a started scan into a PIL image.
+        
+        snap() copies SANE's buffer twice (bytes() and Image.frombuffer);
+        arr_snap() wraps it in a NumPy view, leaving only the copy into PIL.
+        """
+        arr_snap = getattr(scanner, 'arr_snap', None)
+        if arr_snap is None:
+            return scanner.snap()
+        
+        arr = arr_snap()
+        if arr.dtype == np.uint16:
+            # 16-bit depth: keep the high byte, the pipeline is 8-bit
+            arr = (arr >> 8).astype(np.uint8)
+        if arr.shape[2] == 1:
+            arr = arr[:, :, 0]
+        return Image.fromarray(arr)
+    
     def list_scanners(self) -> List[ScannerInfo]:
         """List all SANE scanners"""
         if not self._sane_available:
@@ -52,8 +122,12 @@ class SANEDriver(ScannerDriver):
         scanners = []
         
         try:
-            self._sane.init()
-            devices = self._sane.get_devices()
+            devices = self._get_devices()
+            
+            # ScannerInfo is frozen, so the list built for this enumeration
+            # can be handed out again until the devices are probed anew
+            if self._scanner_infos is not None and self._scanner_infos[0] is devices:
+                return list(self._scanner_infos[1])
             
             for device_id, manufacturer, model, device_type in devices:
                 scanner_info = ScannerInfo(
@@ -66,7 +140,7 @@ class SANEDriver(ScannerDriver):
                 )
                 scanners.append(scanner_info)
             
-            self._sane.exit()
+            self._scanner_infos = (devices, tuple(scanners))
             
         except Exception:
             # SANE initialization failed
@@ -91,6 +165,25 @@ class SANEDriver(ScannerDriver):
         Returns:
             Path to saved scan
         """
+        image = self.scan_to_memory(scanner_id, settings)
+        
+        return self.save_image(image, output_path, settings)
+    
+    def scan_to_memory(
+        self,
+        scanner_id: str,
+        settings: Optional[ScanSettings] = None
+    ) -> Image.Image:
+        """
+        Scan using SANE and return the PIL image from snap().
+        
+        Args:
+            scanner_id: SANE device ID (e.g., epson2:net:192.168.1.208)
+            settings: Scan settings
+        
+        Returns:
+            Scanned PIL image
+        """
         if not self._sane_available:
             raise ScannerNotAvailableError("SANE is not available")
         
@@ -105,73 +198,22 @@ class SANEDriver(ScannerDriver):
         }.get(settings.color_mode, "Color")
         
         try:
-            self._sane.init()
+            self._ensure_init()
             
             # Open scanner
             scanner = self._sane.open(scanner_id)
-            
-            # Configure scanner
-            # Set source to Flatbed if available
-            if 'source' in scanner.opt:
-                available_sources = scanner.opt['source'].constraint
-                if scanner.opt['source'].is_active():
-                    flatbed_names = ['Flatbed', 'FlatBed', 'Platen', 'Normal']
-                    for source_name in flatbed_names:
-                        if source_name in available_sources:
-                            try:
-                                scanner.source = source_name
-                                break
-                            except AttributeError:
-                                pass
-            
-            # Set mode and resolution
-            scanner.mode = sane_mode
-            scanner.resolution = settings.resolution
-            
-            # Scan with retry logic (scanner may need warm-up)
-            max_retries = 3
-            retry_delay = 2
-            
-            image = None
-            last_error = None
-            
-            for attempt in range(max_retries):
-                try:
-                    if attempt > 0:
-                        import time
-                        time.sleep(retry_delay)
-                    
-                    scanner.start()
-                    image = scanner.snap()
-                    break
-                    
-                except Exception as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        continue
-                    else:
-                        raise
-            
-            if image is None:
-                raise ScannerIOError(f"Scan failed: {last_error}")
-            
-            # Save image
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            image.save(output_file)
-            
-            scanner.close()
-            self._sane.exit()
-            
-            return output_file
+            try:
+                return self._configure_and_snap(scanner, sane_mode, settings)
+            finally:
+                scanner.close()
             
         except Exception as e:
             if isinstance(e, ScannerError):
                 raise
             
-            # Try to clean up
+            # Start SANE from scratch next time, the backend may be wedged
             try:
-                self._sane.exit()
+                self.close()
             except:
                 pass
             
@@ -183,6 +225,57 @@ class SANEDriver(ScannerDriver):
                     "Try pressing a button on the scanner to wake it up."
                 )
             elif "invalid argument" in error_msg or "not found" in error_msg:
+                self._devices = None  # Device list is stale, probe again next time
                 raise ScannerNotFoundError(f"Scanner not found: {scanner_id}")
             else:
                 raise ScannerError(f"SANE scan failed: {e}")
+    
+    def _configure_and_snap(self, scanner, sane_mode: str, settings: ScanSettings) -> Image.Image:
+        """Apply source/mode/resolution to an open device and scan one frame"""
+        # Configure scanner
+        # Set source to Flatbed if available
+        if 'source' in scanner.opt:
+            available_sources = scanner.opt['source'].constraint
+            if scanner.opt['source'].is_active():
+                flatbed_names = ['Flatbed', 'FlatBed', 'Platen', 'Normal']
+                for source_name in flatbed_names:
+                    if source_name in available_sources:
+                        try:
+                            scanner.source = source_name
+                            break
+                        except AttributeError:
+                            pass
+        
+        # Set mode and resolution
+        scanner.mode = sane_mode
+        scanner.resolution = settings.resolution
+        
+        # Scan with retry logic (scanner may need warm-up). Back off
+        # exponentially from 0.2 s: a quick hiccup costs a fraction of a
+        # second, while the ~3 s total still covers a lamp warm-up
+        max_retries = 5
+        retry_delay = 0.2
+        
+        image = None
+        last_error = None
+        
+        for attempt in range(max_retries):
+            try:
+                if attempt > 0:
+                    time.sleep(retry_delay * 2 ** (attempt - 1) + random.uniform(0, 0.05))
+                
+                scanner.start()
+                image = self._snap(scanner)
+                break
+                
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries - 1:
+                    continue
+                else:
+                    raise
+        
+        if image is None:
+            raise ScannerIOError(f"Scan failed: {last_error}")
+        
+        return image
@@ -4,8 +4,10 @@ Simulation scanner driver
 Generates simulated A4 scans for testing without hardware.
 """
 
+import io
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
 
@@ -15,6 +17,7 @@ from .base import (
     ScanSettings,
     ColorMode,
     ScannerError,
+    write_atomic,
 )
 
 
@@ -61,7 +64,8 @@ class SimulationDriver(ScannerDriver):
         Args:
             scanner_id: Must be "simulation:virtual"
             output_path: Where to save simulated scan
-            settings: Scan settings (resolution, color mode)
+            settings: Scan settings (resolution, color mode, format; black & white
+                is always a PNG)
         
         Returns:
             Path to saved scan
@@ -69,109 +73,200 @@ class SimulationDriver(ScannerDriver):
         if settings is None:
             settings = ScanSettings()
         
-        # Calculate image size based on resolution
-        # A4 = 210mm x 297mm = 8.27" x 11.69"
-        width_inches = 8.27
-        height_inches = 11.69
-        width_px = int(width_inches * settings.resolution)
-        height_px = int(height_inches * settings.resolution)
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        # A black & white page is always blank; its PNG never changes
+        if settings.color_mode == ColorMode.BLACK_WHITE:
+            return write_atomic(output_file, _blank_png(settings.resolution))
         
-        # Create image based on color mode
-        if settings.color_mode == ColorMode.COLOR:
-            image = Image.new('RGB', (width_px, height_px), color='white')
-        elif settings.color_mode == ColorMode.GRAYSCALE:
-            image = Image.new('L', (width_px, height_px), color=255)
-        else:  # BLACK_WHITE
-            image = Image.new('1', (width_px, height_px), color=1)
+        image = self.scan_to_memory(scanner_id, settings)
+        dpi = (settings.resolution, settings.resolution)
+        
+        buffer = io.BytesIO()
+        if settings.format.upper() in ("JPEG", "JPG"):
+            # Much faster than deflate for the full-page colour render
+            output_file = output_file.with_suffix(".jpg")
+            image.save(buffer, 'JPEG', dpi=dpi, quality=85)
+        else:
+            # Fast compression, like the other drivers' PNG output
+            image.save(buffer, 'PNG', dpi=dpi, compress_level=1)
+        
+        return write_atomic(output_file, buffer.getbuffer())
+    
+    def scan_to_memory(
+        self,
+        scanner_id: str,
+        settings: Optional[ScanSettings] = None
+    ) -> Image.Image:
+        """
+        Generate a simulated scan in memory.
+        
+        Args:
+            scanner_id: Must be "simulation:virtual"
+            settings: Scan settings (resolution, color mode)
         
-        # Only add content for color/grayscale
+        Returns:
+            Simulated PIL image
+        """
+        if settings is None:
+            settings = ScanSettings()
+        
+        image = _render_template(settings.resolution, settings.color_mode).copy()
+        
+        # Only the timestamp changes between scans
         if settings.color_mode != ColorMode.BLACK_WHITE:
+            layout = _layout(settings.resolution)
             draw = ImageDraw.Draw(image)
-            
-            # Draw border
-            border_width = int(width_px * 0.02)
-            draw.rectangle(
-                [(border_width, border_width), 
-                 (width_px - border_width, height_px - border_width)],
-                outline='black',
-                width=3
-            )
-            
-            # Try to use system font
-            try:
-                font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 
-                                               int(settings.resolution / 3.75))
-                font_medium = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 
-                                                 int(settings.resolution / 6))
-                font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 
-                                               int(settings.resolution / 7.5))
-            except:
-                font_large = ImageFont.load_default()
-                font_medium = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            
-            # Add title
-            y_pos = int(height_px * 0.1)
-            draw.text((width_px // 2, y_pos), "SIMULATED A4 DOCUMENT",
-                     fill='black', font=font_large, anchor="mm")
-            
-            y_pos += int(height_px * 0.08)
-            draw.text((width_px // 2, y_pos), "Proof of Concept - Scanner Test",
-                     fill='gray', font=font_medium, anchor="mm")
-            
-            # Add metadata
-            y_pos += int(height_px * 0.1)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            draw.text((width_px // 2, y_pos), f"Generated: {timestamp}",
-                     fill='black', font=font_small, anchor="mm")
-            
-            y_pos += int(height_px * 0.05)
-            draw.text((width_px // 2, y_pos), f"Resolution: {settings.resolution} DPI",
-                     fill='black', font=font_small, anchor="mm")
-            
-            y_pos += int(height_px * 0.04)
-            draw.text((width_px // 2, y_pos), f"Size: {width_px} x {height_px} pixels",
-                     fill='black', font=font_small, anchor="mm")
-            
-            y_pos += int(height_px * 0.04)
-            draw.text((width_px // 2, y_pos), f"Mode: {settings.color_mode.value}",
-                     fill='black', font=font_small, anchor="mm")
-            
-            # Draw quadrant markers
-            mid_x = width_px // 2
-            mid_y = height_px // 2
-            
-            draw.line([(mid_x, border_width), (mid_x, height_px - border_width)],
-                     fill='lightgray', width=2)
-            draw.line([(border_width, mid_y), (width_px - border_width, mid_y)],
-                     fill='lightgray', width=2)
-            
-            # Label quadrants
-            quadrants = [
-                ("Q1", mid_x // 2, mid_y // 2),
-                ("Q2", mid_x + mid_x // 2, mid_y // 2),
-                ("Q3", mid_x // 2, mid_y + mid_y // 2),
-                ("Q4", mid_x + mid_x // 2, mid_y + mid_y // 2),
-            ]
-            
-            for label, x, y in quadrants:
-                draw.text((x, y), label, fill='lightblue', 
-                         font=font_medium, anchor="mm")
-            
-            # Add footer
-            y_pos = int(height_px * 0.85)
-            draw.text((width_px // 2, y_pos),
-                     "This simulated document will be split into 4 equal parts",
-                     fill='black', font=font_small, anchor="mm")
-            
-            y_pos += int(height_px * 0.04)
-            draw.text((width_px // 2, y_pos),
-                     "Use for testing without a physical scanner",
-                     fill='darkgreen', font=font_small, anchor="mm")
+            top, bottom = _draw_timestamp(draw, layout, _fonts(settings.resolution)[2])
+            # The quadrant marker runs through the timestamp; put it back on top
+            _draw_vertical_marker(draw, layout, top, bottom)
         
-        # Save image
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        image.save(output_file, 'PNG', dpi=(settings.resolution, settings.resolution))
-        
-        return output_file
+        return image
+
+
+def _layout(resolution: int) -> dict:
+    """Page size and the positions shared by the template and the timestamp"""
+    # A4 = 210mm x 297mm = 8.27" x 11.69"
+    width_inches = 8.27
+    height_inches = 11.69
+    width_px = int(width_inches * resolution)
+    height_px = int(height_inches * resolution)
+    return {
+        'width': width_px,
+        'height': height_px,
+        'border': int(width_px * 0.02),
+        'timestamp_y': int(height_px * 0.1) + int(height_px * 0.08) + int(height_px * 0.1),
+    }
+
+
+@lru_cache(maxsize=None)
+def _fonts(resolution: int) -> tuple:
+    """(large, medium, small) fonts for a resolution, loaded once"""
+    try:
+        return (
+            ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", int(resolution / 3.75)),
+            ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", int(resolution / 6)),
+            ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", int(resolution / 7.5)),
+        )
+    except OSError:
+        font = ImageFont.load_default()
+        return font, font, font
+
+
+def _draw_timestamp(draw: ImageDraw.ImageDraw, layout: dict, font) -> Tuple[int, int]:
+    """Draw the "Generated:" line and return the rows it covers"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    xy = (layout['width'] // 2, layout['timestamp_y'])
+    text = f"Generated: {timestamp}"
+    draw.text(xy, text, fill='black', font=font, anchor="mm")
+    _, top, _, bottom = draw.textbbox(xy, text, font=font, anchor="mm")
+    return top, bottom
+
+
+def _draw_vertical_marker(draw: ImageDraw.ImageDraw, layout: dict,
+                          top: Optional[int] = None, bottom: Optional[int] = None) -> None:
+    """Vertical quadrant line, optionally only between rows top and bottom"""
+    mid_x = layout['width'] // 2
+    top = layout['border'] if top is None else max(top, layout['border'])
+    bottom = layout['height'] - layout['border'] if bottom is None else min(bottom, layout['height'] - layout['border'])
+    draw.line([(mid_x, top), (mid_x, bottom)], fill='lightgray', width=2)
+
+
+@lru_cache(maxsize=8)
+def _blank_png(resolution: int) -> bytes:
+    """Encoded PNG of the blank black & white page at a resolution"""
+    buffer = io.BytesIO()
+    _render_template(resolution, ColorMode.BLACK_WHITE).save(
+        buffer, 'PNG', dpi=(resolution, resolution), compress_level=1)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=8)
+def _render_template(resolution: int, color_mode: ColorMode) -> Image.Image:
+    """
+    Everything on the simulated page except the timestamp.
+    
+    Cached per (resolution, color mode); callers must copy() the result.
+    """
+    layout = _layout(resolution)
+    width_px = layout['width']
+    height_px = layout['height']
+    
+    # Create image based on color mode
+    if color_mode == ColorMode.COLOR:
+        image = Image.new('RGB', (width_px, height_px), color='white')
+    elif color_mode == ColorMode.GRAYSCALE:
+        image = Image.new('L', (width_px, height_px), color=255)
+    else:  # BLACK_WHITE
+        return Image.new('1', (width_px, height_px), color=1)
+    
+    draw = ImageDraw.Draw(image)
+    
+    # Draw border
+    border_width = layout['border']
+    draw.rectangle(
+        [(border_width, border_width), 
+         (width_px - border_width, height_px - border_width)],
+        outline='black',
+        width=3
+    )
+    
+    font_large, font_medium, font_small = _fonts(resolution)
+    
+    # Add title
+    y_pos = int(height_px * 0.1)
+    draw.text((width_px // 2, y_pos), "SIMULATED A4 DOCUMENT",
+             fill='black', font=font_large, anchor="mm")
+    
+    y_pos += int(height_px * 0.08)
+    draw.text((width_px // 2, y_pos), "Proof of Concept - Scanner Test",
+             fill='gray', font=font_medium, anchor="mm")
+    
+    # Add metadata (the "Generated:" line goes at layout['timestamp_y'])
+    y_pos = layout['timestamp_y']
+    
+    y_pos += int(height_px * 0.05)
+    draw.text((width_px // 2, y_pos), f"Resolution: {resolution} DPI",
+             fill='black', font=font_small, anchor="mm")
+    
+    y_pos += int(height_px * 0.04)
+    draw.text((width_px // 2, y_pos), f"Size: {width_px} x {height_px} pixels",
+             fill='black', font=font_small, anchor="mm")
+    
+    y_pos += int(height_px * 0.04)
+    draw.text((width_px // 2, y_pos), f"Mode: {color_mode.value}",
+             fill='black', font=font_small, anchor="mm")
+    
+    # Draw quadrant markers
+    mid_x = width_px // 2
+    mid_y = height_px // 2
+    
+    _draw_vertical_marker(draw, layout)
+    draw.line([(border_width, mid_y), (width_px - border_width, mid_y)],
+             fill='lightgray', width=2)
+    
+    # Label quadrants
+    quadrants = [
+        ("Q1", mid_x // 2, mid_y // 2),
+        ("Q2", mid_x + mid_x // 2, mid_y // 2),
+        ("Q3", mid_x // 2, mid_y + mid_y // 2),
+        ("Q4", mid_x + mid_x // 2, mid_y + mid_y // 2),
+    ]
+    
+    for label, x, y in quadrants:
+        draw.text((x, y), label, fill='lightblue', 
+                 font=font_medium, anchor="mm")
+    
+    # Add footer
+    y_pos = int(height_px * 0.85)
+    draw.text((width_px // 2, y_pos),
+             "This simulated document will be split into 4 equal parts",
+             fill='black', font=font_small, anchor="mm")
+    
+    y_pos += int(height_px * 0.04)
+    draw.text((width_px // 2, y_pos),
+             "Use for testing without a physical scanner",
+             fill='darkgreen', font=font_small, anchor="mm")
+    
+    return image
@@ -4,6 +4,7 @@ WIA (Windows Image Acquisition) scanner driver
 Uses WIA for scanning on Windows.
 """
 
+import time
 from pathlib import Path
 from typing import List, Optional
 
@@ -27,8 +28,14 @@ class WIADriver(ScannerDriver):
     Only available on Windows.
     """
     
+    # How long a device enumeration is reused (seconds); creating the WIA
+    # DeviceManager is slow, and the web UI lists scanners repeatedly
+    DEVICE_CACHE_TTL = 5
+    
     def __init__(self):
         self._wia_available = False
+        self._scanners = None
+        self._scanners_at = 0.0
         
         try:
             import win32com.client
@@ -43,40 +50,72 @@ class WIADriver(ScannerDriver):
         """WIA is only available on Windows with pywin32"""
         return self._wia_available
     
+    def invalidate_cache(self):
+        """Forget the cached scanner list"""
+        self._scanners = None
+    
     def list_scanners(self) -> List[ScannerInfo]:
-        """List all WIA scanners"""
+        """List all WIA scanners, reusing the last list for DEVICE_CACHE_TTL"""
         if not self._wia_available:
             return []
         
-        scanners = []
+        now = time.monotonic()
+        if self._scanners is not None and now - self._scanners_at <= self.DEVICE_CACHE_TTL:
+            return list(self._scanners)
         
         try:
+            import pythoncom
             import win32com.client
+            import win32com.client.gencache
             
-            device_manager = win32com.client.Dispatch("WIA.DeviceManager")
-            
-            for i in range(1, device_manager.DeviceInfos.Count + 1):
-                device_info = device_manager.DeviceInfos[i]
-                
-                try:
-                    name = device_info.Properties('Name').Value
-                    device_id = str(i)  # Use index as ID
-                    
-                    scanner_info = ScannerInfo(
-                        id=device_id,
-                        name=name,
-                        driver="wia",
-                        manufacturer=None,  # Could extract from name
-                        model=None,
-                        connection="unknown"
-                    )
-                    scanners.append(scanner_info)
-                except:
-                    continue
-                    
+            # ScannerManager lists drivers on worker threads, which need
+            # their own COM initialization before Dispatch()
+            pythoncom.CoInitialize()
+            try:
+                scanners = self._enumerate(win32com.client)
+            finally:
+                pythoncom.CoUninitialize()
         except Exception:
             # WIA initialization failed
-            pass
+            return []
+        
+        self._scanners = scanners
+        self._scanners_at = now
+        return list(scanners)
+    
+    @staticmethod
+    def _enumerate(client) -> List[ScannerInfo]:
+        """ScannerInfo for every device the WIA DeviceManager knows"""
+        scanners = []
+        
+        try:
+            # Early binding: the generated type library wrapper skips an
+            # IDispatch name lookup on every property read
+            device_manager = client.gencache.EnsureDispatch("WIA.DeviceManager")
+        except Exception:
+            # gen_py cache not writable or type library missing
+            device_manager = client.Dispatch("WIA.DeviceManager")
+        
+        # Every attribute access is a COM call; fetch the collection once
+        device_infos = device_manager.DeviceInfos
+        for i in range(1, device_infos.Count + 1):
+            device_info = device_infos[i]
+            
+            try:
+                name = device_info.Properties('Name').Value
+                device_id = str(i)  # Use index as ID
+                
+                scanner_info = ScannerInfo(
+                    id=device_id,
+                    name=name,
+                    driver="wia",
+                    manufacturer=None,  # Could extract from name
+                    model=None,
+                    connection="unknown"
+                )
+                scanners.append(scanner_info)
+            except:
+                continue
         
         return scanners
     
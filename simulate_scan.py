@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """
 Simulation Mode: Create Simulated A4 Scans
-Usage: python simulate_scan.py [output_path]
+Usage: python simulate_scan.py [output_path] [--debug]
 
 This script generates realistic A4 document scans for testing
-without requiring scanner hardware.
+without requiring scanner hardware. The format follows the output
+suffix: JPEG by default, PNG for a .png path.
 """
 
 import sys
@@ -12,81 +13,71 @@ from datetime import datetime
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 
+FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
 
-def create_simulated_scan(output_path="scanned_document.png"):
+# Loaded fonts, shared across calls
+_FONT_CACHE: dict[int, ImageFont.FreeTypeFont] = {}
+
+
+def _get_font(size: int):
+    """Load the document font once per size, falling back to Pillow's default"""
+    font = _FONT_CACHE.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype(FONT_PATH, size)
+        except OSError:
+            font = ImageFont.load_default()
+        _FONT_CACHE[size] = font
+    return font
+
+
+# A4 at 300 DPI: 2480 x 3508 pixels
+PAGE_WIDTH, PAGE_HEIGHT = 2480, 3508
+BORDER_WIDTH = 50
+TIMESTAMP_Y = 550
+LIGHT_GRAY = (211, 211, 211)
+
+# Everything except the timestamp, rendered once per process
+_TEMPLATE = None
+
+
+def _render_template() -> Image.Image:
     """
-    Create a simulated A4 scan for demonstration purposes.
-    This is used when no actual scanner hardware is available.
-    
-    Args:
-        output_path: Where to save the simulated scan
+    Render the static part of the simulated document.
     
-    Returns:
-        Path object to the saved file
+    Border and quadrant cross are solid fills pasted into the page in
+    place; only the text goes through ImageDraw.
     """
-    print("\n📝 SIMULATION MODE - Generating A4 document...")
-    print("(No scanner hardware required)\n")
+    width, height, border = PAGE_WIDTH, PAGE_HEIGHT, BORDER_WIDTH
+    mid_x = width // 2
+    mid_y = height // 2
     
-    # A4 at 300 DPI: 2480 x 3508 pixels
-    width, height = 2480, 3508
+    # White page with a 3px black border
+    image = Image.new('RGB', (width, height), 'white')
+    black = (0, 0, 0)
+    image.paste(black, (border, border, width - border + 1, border + 3))
+    image.paste(black, (border, height - border - 2, width - border + 1, height - border + 1))
+    image.paste(black, (border, border, border + 3, height - border + 1))
+    image.paste(black, (width - border - 2, border, width - border + 1, height - border + 1))
     
-    # Create white background
-    image = Image.new('RGB', (width, height), color='white')
     draw = ImageDraw.Draw(image)
     
-    # Add some text and shapes to simulate a document
-    # Draw a border
-    border_width = 50
-    draw.rectangle(
-        [(border_width, border_width), (width - border_width, height - border_width)],
-        outline='black',
-        width=3
-    )
+    font_large = _get_font(80)
+    font_medium = _get_font(50)
+    font_small = _get_font(40)
     
-    # Add title text
-    try:
-        # Try to use a default font, fall back to default if not available
-        font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 80)
-        font_medium = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 50)
-        font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-    except:
-        # Fallback to default font
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-    
-    # Add document content
-    y_position = 200
-    
-    draw.text((width // 2, y_position), "SIMULATED A4 DOCUMENT", 
+    draw.text((mid_x, 200), "SIMULATED A4 DOCUMENT", 
               fill='black', font=font_large, anchor="mm")
-    
-    y_position += 150
-    draw.text((width // 2, y_position), "Proof of Concept - Scanner Demo", 
+    draw.text((mid_x, 350), "Proof of Concept - Scanner Demo", 
               fill='gray', font=font_medium, anchor="mm")
-    
-    y_position += 200
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    draw.text((width // 2, y_position), f"Generated: {timestamp}", 
-              fill='black', font=font_small, anchor="mm")
-    
-    y_position += 100
-    draw.text((width // 2, y_position), "Resolution: 300 DPI", 
+    draw.text((mid_x, 650), "Resolution: 300 DPI", 
               fill='black', font=font_small, anchor="mm")
-    
-    y_position += 80
-    draw.text((width // 2, y_position), f"Size: {width} x {height} pixels", 
+    draw.text((mid_x, 730), f"Size: {width} x {height} pixels", 
               fill='black', font=font_small, anchor="mm")
     
-    # Add quadrant markers (to help visualize 2x2 split)
-    mid_x = width // 2
-    mid_y = height // 2
-    
-    # Draw center cross
-    draw.line([(mid_x, border_width), (mid_x, height - border_width)], 
-              fill='lightgray', width=2)
-    draw.line([(border_width, mid_y), (width - border_width, mid_y)], 
-              fill='lightgray', width=2)
+    # Center cross (to help visualize 2x2 split), drawn over the title text
+    image.paste(LIGHT_GRAY, (mid_x, border, mid_x + 2, height - border + 1))
+    image.paste(LIGHT_GRAY, (border, mid_y, width - border + 1, mid_y + 2))
     
     # Label quadrants
     quadrant_labels = [
@@ -100,26 +91,76 @@ def create_simulated_scan(output_path="scanned_document.png"):
         draw.text((x, y), label, fill='lightblue', font=font_medium, anchor="mm")
     
     # Add some sample content blocks
-    y_position = height - 400
-    draw.text((width // 2, y_position), 
+    draw.text((mid_x, height - 400), 
               "This simulated document will be split into 4 equal parts", 
               fill='black', font=font_small, anchor="mm")
-    
-    y_position += 80
-    draw.text((width // 2, y_position), 
+    draw.text((mid_x, height - 320), 
               "Use this for testing without a physical scanner", 
               fill='darkgreen', font=font_small, anchor="mm")
     
+    return image
+
+
+def create_simulated_scan(output_path="scanned_document.jpg", format=None):
+    """
+    Create a simulated A4 scan for demonstration purposes.
+    This is used when no actual scanner hardware is available.
+    
+    Args:
+        output_path: Where to save the simulated scan
+        format: "JPEG" or "PNG"; by default PNG for a .png path, else JPEG.
+            The suffix is rewritten to match (.jpg / .png)
+    
+    Returns:
+        Path object to the saved file
+    """
+    global _TEMPLATE
+    
+    print("\n📝 SIMULATION MODE - Generating A4 document...")
+    print("(No scanner hardware required)\n")
+    
+    if _TEMPLATE is None:
+        _TEMPLATE = _render_template()
+    
+    # Only the timestamp changes between calls
+    image = _TEMPLATE.copy()
+    draw = ImageDraw.Draw(image)
+    
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    draw.text((PAGE_WIDTH // 2, TIMESTAMP_Y), f"Generated: {timestamp}", 
+              fill='black', font=_get_font(40), anchor="mm")
+    
+    # Keep the center line on top of the timestamp text
+    mid_x = PAGE_WIDTH // 2
+    image.paste(LIGHT_GRAY, (mid_x, TIMESTAMP_Y - 40, mid_x + 2, TIMESTAMP_Y + 40))
+    
     # Save the simulated scan
     output_file = Path(output_path)
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    image.save(output_file, 'PNG', dpi=(300, 300))
-    
-    print(f"✓ Simulated scan complete!")
-    print(f"  Saved to: {output_file.absolute()}")
-    print(f"  Size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
-    print(f"  Dimensions: {image.size[0]} x {image.size[1]} pixels")
-    print(f"  DPI: 300 x 300")
+    if format is None:
+        format = "PNG" if output_file.suffix.lower() == ".png" else "JPEG"
+    if format.upper() == "PNG":
+        output_file = output_file.with_suffix(".png")
+    elif output_file.suffix.lower() not in (".jpg", ".jpeg"):
+        output_file = output_file.with_suffix(".jpg")
+    # One large user-space buffer: the encoder's many small chunk writes
+    # reach the kernel as a few big write() calls
+    with open(output_file, 'wb', buffering=1 << 20) as fp:
+        if format.upper() == "PNG":
+            # Fast deflate: the synthetic page compresses well even at level 1
+            image.save(fp, 'PNG', dpi=(300, 300), compress_level=1, optimize=False)
+        else:
+            # JPEG encodes the flat page many times faster than deflate
+            image.save(fp, 'JPEG', dpi=(300, 300), quality=85,
+                       optimize=False, progressive=False)
+    
+    print("\n".join([
+        "✓ Simulated scan complete!",
+        f"  Saved to: {output_file}",
+        f"  Size: {output_file.stat().st_size / 1024 / 1024:.2f} MB",
+        f"  Dimensions: {image.size[0]} x {image.size[1]} pixels",
+        "  DPI: 300 x 300",
+    ]))
     
     return output_file
 
@@ -131,11 +172,12 @@ def main():
     print("=" * 60)
     
     # Generate output filename with timestamp
-    if len(sys.argv) > 1:
-        output_path = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args:
+        output_path = args[0]
     else:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = f"simulated_scan_{timestamp}.png"
+        output_path = f"simulated_scan_{timestamp}.jpg"
     
     try:
         create_simulated_scan(output_path)
@@ -146,8 +188,9 @@ def main():
         
     except Exception as e:
         print(f"\n✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        if "--debug" in sys.argv:
+            import traceback
+            traceback.print_exc()
         sys.exit(1)
 
 
@@ -10,82 +10,107 @@ import cv2
 import numpy as np
 from pathlib import Path
 from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import io
 
+from scan_split_numba import content_bounds
+
+# zlib level 1: most of the size reduction of the higher levels at a
+# fraction of the CPU time; pinned so it doesn't depend on the OpenCV build
+PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+
 
 def capture_logs(func):
-    """Decorator to capture print statements to a log"""
+    """
+    Decorator to capture print statements to a log.
+    
+    The output is collected in memory and written to the real stdout in
+    one go when the function returns (or fails), instead of one
+    line-buffered write per print.
+    """
     def wrapper(*args, **kwargs):
         log_buffer = io.StringIO()
         original_stdout = sys.stdout
-        
-        class TeeOutput:
-            def __init__(self, *outputs):
-                self.outputs = outputs
-            def write(self, text):
-                for output in self.outputs:
-                    output.write(text)
-            def flush(self):
-                for output in self.outputs:
-                    output.flush()
-        
-        sys.stdout = TeeOutput(original_stdout, log_buffer)
+        sys.stdout = log_buffer
         
         try:
             result = func(*args, **kwargs)
             return result, log_buffer.getvalue()
         finally:
             sys.stdout = original_stdout
+            original_stdout.write(log_buffer.getvalue())
+            original_stdout.flush()
             log_buffer.close()
     
     return wrapper
 
 
 def load_image(image_path: str) -> np.ndarray:
-    """Load image from file"""
-    img = cv2.imread(image_path)
+    """
+    Load image from file (OpenCV's libpng/libjpeg decode).
+    
+    Colour files come back as 3-channel BGR; grayscale scans stay a single
+    8-bit plane instead of being expanded to BGR and converted back.
+    """
+    img = cv2.imread(str(image_path), cv2.IMREAD_ANYCOLOR)
     if img is None:
         raise FileNotFoundError(f"Cannot load image: {image_path}")
     return img
 
 
-def detect_photos(img: np.ndarray, gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+def detect_photos(img: np.ndarray, gray: np.ndarray, scale: int = 1) -> List[Tuple[int, int, int, int]]:
     """
     Detect individual photos using contour detection.
     
     Args:
         img: Original BGR image
         gray: Grayscale version
+        scale: Run detection on a copy shrunk scale times (INTER_AREA), with
+            the filter sizes shrunk to match. Much faster; 2 finds the same
+            photos as full resolution on typical scans, larger factors can
+            miss faint ones. Boxes are only accurate to scale pixels;
+            refine_photo_bounds finds the exact edges afterwards.
     
     Returns:
         List of bounding boxes (x, y, w, h) for each detected photo
     """
     print("\nDetecting photos using contour analysis...")
     
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    
-    # Use adaptive thresholding to handle varying background brightness
+    block_size = max(3, (51 // scale) | 1)
+    kernel_size = max(1, round(7 / scale))
+    
+    if scale > 1:
+        # Area averaging already smooths out the noise the blur is for;
+        # blurring the small image as well washes out thin photo edges
+        blurred = cv2.resize(gray, (gray.shape[1] // scale, gray.shape[0] // scale),
+                             interpolation=cv2.INTER_AREA)
+    else:
+        # Apply Gaussian blur to reduce noise
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    
+    # Use adaptive thresholding to handle varying background brightness.
+    # The box mean runs in constant time per pixel, unlike a 51x51 Gaussian;
+    # the lower C makes up for the flatter weighting
     binary = cv2.adaptiveThreshold(
         blurred,
         255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.ADAPTIVE_THRESH_MEAN_C,
         cv2.THRESH_BINARY_INV,
-        blockSize=51,
-        C=10
+        blockSize=block_size,
+        C=6
     )
     
-    # Morphological operations to clean up and connect photo regions
-    kernel = np.ones((15, 15), np.uint8)
+    # Morphological closing to connect photo regions. No opening pass: the
+    # specks it removed are far below min_area and get filtered out below
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
     binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-    binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
     
     # Find contours
     contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
     # Filter contours by area and aspect ratio
-    min_area = (img.shape[0] * img.shape[1]) * 0.02  # At least 2% of image
-    max_area = (img.shape[0] * img.shape[1]) * 0.9   # At most 90% of image
+    min_area = (binary.shape[0] * binary.shape[1]) * 0.02  # At least 2% of image
+    max_area = (binary.shape[0] * binary.shape[1]) * 0.9   # At most 90% of image
     
     photo_boxes = []
     
@@ -95,8 +120,9 @@ def detect_photos(img: np.ndarray, gray: np.ndarray) -> List[Tuple[int, int, int
         if area < min_area or area > max_area:
             continue
         
-        # Get bounding rectangle
-        x, y, w, h = cv2.boundingRect(contour)
+        # Get bounding rectangle, in full-resolution pixels
+        x, y, w, h = (v * scale for v in cv2.boundingRect(contour))
+        area *= scale * scale
         
         # Filter out very thin/small regions
         if w < 100 or h < 100:
@@ -120,6 +146,10 @@ def detect_photos(img: np.ndarray, gray: np.ndarray) -> List[Tuple[int, int, int
     return photo_boxes
 
 
+# Pixels brighter than this are white background
+BACKGROUND_THRESHOLD = 220
+
+
 def refine_photo_bounds(img: np.ndarray, gray: np.ndarray, x: int, y: int, w: int, h: int) -> Tuple[int, int, int, int]:
     """
     Refine photo boundaries to remove white borders and straighten edges.
@@ -141,72 +171,63 @@ def refine_photo_bounds(img: np.ndarray, gray: np.ndarray, x: int, y: int, w: in
     
     region = gray[y1:y2, x1:x2]
     
-    # Apply threshold to find content
-    _, binary = cv2.threshold(region, 220, 255, cv2.THRESH_BINARY_INV)
-    
-    # Find content bounds
-    rows_with_content = np.any(binary > 0, axis=1)
-    cols_with_content = np.any(binary > 0, axis=0)
-    
-    row_indices = np.where(rows_with_content)[0]
-    col_indices = np.where(cols_with_content)[0]
-    
-    if len(row_indices) == 0 or len(col_indices) == 0:
-        # No refinement possible, return original
-        return x, y, w, h
-    
-    # Calculate refined bounds
-    new_y1 = y1 + row_indices[0]
-    new_y2 = y1 + row_indices[-1]
-    new_x1 = x1 + col_indices[0]
-    new_x2 = x1 + col_indices[-1]
+    if content_bounds is not None:
+        # JIT kernel: walks in from each edge, reading only the margins
+        top, bottom, left, right = content_bounds(region, BACKGROUND_THRESHOLD)
+        if top < 0:
+            # No refinement possible, return original
+            return x, y, w, h
+    else:
+        # A row/column has content if its darkest pixel isn't background.
+        # Min-projections work on the gray values directly, without a
+        # thresholded copy of the region
+        rows_with_content = region.min(axis=1) <= BACKGROUND_THRESHOLD
+        cols_with_content = region.min(axis=0) <= BACKGROUND_THRESHOLD
+        
+        if not rows_with_content.any():
+            # No refinement possible, return original
+            return x, y, w, h
+        
+        # First/last content row and column; argmax stops at the first True
+        # instead of building full index arrays
+        top = rows_with_content.argmax()
+        bottom = len(rows_with_content) - 1 - rows_with_content[::-1].argmax()
+        left = cols_with_content.argmax()
+        right = len(cols_with_content) - 1 - cols_with_content[::-1].argmax()
+    
+    new_y1 = y1 + top
+    new_y2 = y1 + bottom
+    new_x1 = x1 + left
+    new_x2 = x1 + right
     
     return new_x1, new_y1, new_x2 - new_x1, new_y2 - new_y1
 
 
-@capture_logs
-def split_photos_smart(
-    image_path: str,
-    output_dir: str = "photos"
-) -> List[str]:
+def crop_photos(img: np.ndarray, detect_scale: int = 1) -> List[np.ndarray]:
     """
-    Split scanned page into individual photos using contour detection.
-    Automatically detects 1-4 photos of any size and orientation.
+    Detect photos in an already loaded scan and return the cropped regions.
     
     Args:
-        image_path: Path to scanned image
-        output_dir: Output directory for split photos
+        img: BGR or single-channel grayscale scan image
+        detect_scale: Downsampling for detect_photos (1 = full resolution)
     
     Returns:
-        List of saved photo file paths
+        List of cropped photos (views into img), top to bottom, left to right
     """
-    print("=" * 60)
-    print("Smart Photo Splitter V3 - Contour Detection")
-    print("=" * 60)
-    
-    # Load image
-    print(f"\nLoading: {image_path}")
-    img = load_image(image_path)
     h, w = img.shape[:2]
     print(f"  Size: {w} x {h} pixels")
     
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # Analysis runs on one 8-bit plane; a grayscale scan already is one
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     
     # Detect photos
-    photo_boxes = detect_photos(img, gray)
+    photo_boxes = detect_photos(img, gray, detect_scale)
     
     if len(photo_boxes) == 0:
-        print("\n⚠ No photos detected!")
         return []
     
-    # Process and save each photo
     print(f"\nExtracting {len(photo_boxes)} photo(s)...")
-    output_files = []
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-    
-    base_name = Path(image_path).stem
+    photos = []
     
     for i, (x, y, w, h) in enumerate(photo_boxes, 1):
         print(f"\n  Photo {i}:")
@@ -217,14 +238,68 @@ def split_photos_smart(
         print(f"    Refined bounds: ({x_refined},{y_refined}) {w_refined}x{h_refined}")
         
         # Extract photo
-        photo = img[y_refined:y_refined+h_refined, x_refined:x_refined+w_refined]
-        
-        # Save
-        output_file = output_path / f"{base_name}_photo_{i}.png"
-        cv2.imwrite(str(output_file), photo)
-        output_files.append(str(output_file))
+        photos.append(img[y_refined:y_refined+h_refined, x_refined:x_refined+w_refined])
+    
+    return photos
+
+
+def _write_png(output_file: str, photo: np.ndarray) -> None:
+    """Encode a BGR or grayscale photo as PNG in memory and write it in one call"""
+    ok, encoded = cv2.imencode(".png", photo, PNG_PARAMS)
+    if not ok:
+        raise IOError(f"Cannot encode PNG: {output_file}")
+    Path(output_file).write_bytes(encoded)
+
+
+def save_photos(photos: List[np.ndarray], base_name: str, output_dir: str) -> List[str]:
+    """
+    Write cropped photos as PNG, encoding them in parallel.
+    
+    cv2.imencode releases the GIL while libpng compresses, so the
+    photos are encoded on separate threads. Each file is then written
+    with a single write() instead of libpng's small stdio chunks.
+    
+    Returns:
+        List of saved photo file paths, in the order of photos
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    output_files = [str(output_path / f"{base_name}_photo_{i}.png")
+                    for i in range(1, len(photos) + 1)]
+    
+    # A page holds at most four photos; don't start threads with nothing to do
+    with ThreadPoolExecutor(max_workers=max(1, min(4, len(photos)))) as pool:
+        list(pool.map(_write_png, output_files, photos))
+    
+    for output_file in output_files:
         print(f"    ✓ Saved: {output_file}")
     
+    return output_files
+
+
+def extract_photos(img: np.ndarray, base_name: str, output_dir: str,
+                   detect_scale: int = 1) -> List[str]:
+    """
+    Detect, crop and save the photos found in an already loaded scan.
+    
+    Args:
+        img: BGR or grayscale scan image
+        base_name: Prefix for the saved photo filenames
+        output_dir: Output directory for split photos
+        detect_scale: Downsampling for detect_photos (1 = full resolution)
+    
+    Returns:
+        List of saved photo file paths
+    """
+    photos = crop_photos(img, detect_scale)
+    
+    if len(photos) == 0:
+        print("\n⚠ No photos detected!")
+        return []
+    
+    output_files = save_photos(photos, base_name, output_dir)
+    
     print("\n" + "=" * 60)
     print(f"✓ Split complete! Saved {len(output_files)} photo(s)")
     print("=" * 60)
@@ -232,16 +307,73 @@ def split_photos_smart(
     return output_files
 
 
+@capture_logs
+def split_photos_smart(
+    image_path: str,
+    output_dir: str = "photos",
+    detect_scale: int = 1
+) -> List[str]:
+    """
+    Split scanned page into individual photos using contour detection.
+    Automatically detects 1-4 photos of any size and orientation.
+    
+    Args:
+        image_path: Path to scanned image
+        output_dir: Output directory for split photos
+        detect_scale: Downsampling for detect_photos (1 = full resolution)
+    
+    Returns:
+        List of saved photo file paths
+    """
+    print("=" * 60)
+    print("Smart Photo Splitter V3 - Contour Detection")
+    print("=" * 60)
+    
+    # Load image
+    print(f"\nLoading: {image_path}")
+    img = load_image(image_path)
+    
+    return extract_photos(img, Path(image_path).stem, output_dir, detect_scale)
+
+
+@capture_logs
+def split_photos_smart_array(
+    img: np.ndarray,
+    base_name: str,
+    output_dir: str = "photos",
+    detect_scale: int = 1
+) -> List[str]:
+    """
+    Same as split_photos_smart, but for a scan that is already in memory.
+    
+    Args:
+        img: BGR or grayscale scan image
+        base_name: Prefix for the saved photo filenames (normally the scan stem)
+        output_dir: Output directory for split photos
+        detect_scale: Downsampling for detect_photos (1 = full resolution)
+    
+    Returns:
+        List of saved photo file paths
+    """
+    print("=" * 60)
+    print("Smart Photo Splitter V3 - Contour Detection")
+    print("=" * 60)
+    
+    print(f"\nUsing in-memory scan: {base_name}")
+    return extract_photos(img, base_name, output_dir, detect_scale)
+
+
 def split_photos_grid_smart(
     image_path: str,
     output_dir: str = "photos",
-    margin_threshold: int = 220
+    margin_threshold: int = 220,
+    detect_scale: int = 1
 ) -> List[str]:
     """
     Wrapper function for backward compatibility with existing code.
     Calls the new contour-based detection.
     """
-    output_files, log_content = split_photos_smart(image_path, output_dir)
+    output_files, log_content = split_photos_smart(image_path, output_dir, detect_scale)
     
     # Save log file
     output_path = Path(output_dir)
@@ -252,9 +384,28 @@ def split_photos_grid_smart(
     return output_files
 
 
+def split_photos_grid_smart_array(
+    img: np.ndarray,
+    output_dir: str = "photos",
+    base_name: str = "scan",
+    detect_scale: int = 1
+) -> List[str]:
+    """
+    split_photos_grid_smart for an in-memory BGR (or grayscale) image, skipping the PNG decode.
+    """
+    output_files, log_content = split_photos_smart_array(img, base_name, output_dir, detect_scale)
+    
+    # Save log file
+    log_file = Path(output_dir) / f"{base_name}_split_log.txt"
+    log_file.write_text(log_content)
+    
+    return output_files
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: smart_split.py <scan_image>")
+        print("Usage: smart_split.py <scan_image> [--fast]")
+        print("  --fast  detect photos at half resolution (edges still exact)")
         sys.exit(1)
     
-    split_photos_grid_smart(sys.argv[1])
+    split_photos_grid_smart(sys.argv[1], detect_scale=2 if "--fast" in sys.argv else 1)
@@ -13,6 +13,8 @@ from pathlib import Path
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
 
+from smart_split import PNG_PARAMS
+
 
 @dataclass
 class PhotoRegion:
@@ -45,14 +47,15 @@ def preprocess_for_edge_detection(image: np.ndarray) -> np.ndarray:
     # Convert to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     
-    # Apply bilateral filter to reduce noise while keeping edges sharp
-    blurred = cv2.bilateralFilter(gray, 9, 75, 75)
+    # Gaussian blur to reduce noise; Canny's 50/150 hysteresis keeps the
+    # photo edges, and it is far cheaper than a bilateral filter
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
     
     # Use Canny edge detection
     edges = cv2.Canny(blurred, 50, 150)
     
     # Close small gaps in edges
-    kernel = np.ones((3, 3), np.uint8)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
     closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=2)
     
     return closed
@@ -213,7 +216,8 @@ def extract_and_straighten_photo(
 def split_photos_smart(
     input_path: str,
     output_dir: str = "photos",
-    debug: bool = False
+    debug: bool = False,
+    png_params: List[int] = PNG_PARAMS
 ) -> List[Path]:
     """
     Smart split: Detect photo edges and extract individual photos.
@@ -222,6 +226,8 @@ def split_photos_smart(
         input_path: Path to scanned image
         output_dir: Output directory for split images
         debug: If True, save debug visualization
+        png_params: cv2.imwrite flags for the output PNGs
+            (default: smart_split's fast compression level)
     
     Returns:
         List of paths to extracted photos
@@ -272,7 +278,7 @@ def split_photos_smart(
         
         # Save
         output_file = output_path / f"{base_name}_photo{i}.png"
-        cv2.imwrite(str(output_file), photo)
+        cv2.imwrite(str(output_file), photo, png_params)
         output_files.append(output_file)
         
         print(f"    Saved: {output_file.name} ({photo.shape[1]}x{photo.shape[0]})")
@@ -300,7 +306,7 @@ def split_photos_smart(
             )
         
         debug_file = output_path / f"{base_name}_debug.png"
-        cv2.imwrite(str(debug_file), debug_image)
+        cv2.imwrite(str(debug_file), debug_image, png_params)
         print()
         print(f"Debug visualization: {debug_file}")
     
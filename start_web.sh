@@ -7,4 +7,5 @@ export PATH="$HOME/.local/bin:$PATH"
 echo "Starting A4 Scanner Web Interface..."
 echo ""
 
-uv run python app.py
+# One process (scan state is per-process), threads for concurrent requests
+uv run gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:8090 app:app
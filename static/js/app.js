@@ -44,6 +44,7 @@ function renderScansList() {
     scansList.innerHTML = scans.map(scan => `
         <div class="p-3 rounded-lg cursor-pointer transition duration-150 ${currentScan?.filename === scan.filename ? 'bg-blue-50 border border-blue-200' : 'bg-gray-50 hover:bg-gray-100 border border-transparent'}"
              onclick="selectScanByFilename('${scan.filename}')">
+            ${scan.thumb ? `<img src="${scan.thumb}" alt="" loading="lazy" class="w-full mb-2 rounded border border-gray-200">` : ''}
             <div class="font-medium text-sm text-gray-800 truncate">${scan.filename}</div>
             <div class="text-xs text-gray-500 mt-1">${formatTime(scan.timestamp)}</div>
         </div>
@@ -84,8 +85,8 @@ function displayPhotos(scan) {
         slot.className = 'rounded-lg overflow-hidden relative';
         
         if (i < scan.photos.length) {
-            // Add cache-busting timestamp to prevent browser caching
-            const photoUrl = `${scan.photos[i]}?t=${Date.now()}`;
+            // Server sends ETag + no-cache, so re-split photos are revalidated
+            const photoUrl = scan.photos[i];
             
             const img = new Image();
             img.src = photoUrl;
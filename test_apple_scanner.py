@@ -4,9 +4,15 @@ Test accessing scanner via Apple's Image Capture framework
 """
 
 import objc
-from Foundation import NSBundle
+from Foundation import NSBundle, NSDate, NSObject, NSRunLoop
+import sys
 import time
 
+# How long to wait for devices: --scan-timeout SECONDS (default 5)
+SCAN_TIMEOUT = 5.0
+if "--scan-timeout" in sys.argv:
+    SCAN_TIMEOUT = float(sys.argv[sys.argv.index("--scan-timeout") + 1])
+
 print("=" * 60)
 print("Testing Apple Image Capture Scanner Access")
 print("=" * 60)
@@ -37,9 +43,29 @@ except:
     print("✗ ICDeviceBrowser not found")
     exit(1)
 
+
+class DeviceBrowserDelegate(NSObject, protocols=[objc.protocolNamed('ICDeviceBrowserDelegate')]):
+    """Notes when the browser has reported its current batch of devices"""
+    
+    def init(self):
+        self = objc.super(DeviceBrowserDelegate, self).init()
+        if self is not None:
+            self.done = False
+        return self
+    
+    def deviceBrowser_didAddDevice_moreComing_(self, browser, device, moreComing):
+        if not moreComing:
+            self.done = True
+    
+    def deviceBrowser_didRemoveDevice_moreGoing_(self, browser, device, moreGoing):
+        pass
+
+
 print()
 print("3. Creating device browser...")
 browser = ICDeviceBrowser.alloc().init()
+delegate = DeviceBrowserDelegate.alloc().init()
+browser.setDelegate_(delegate)
 print(f"✓ Browser created: {browser}")
 
 print()
@@ -48,8 +74,12 @@ browser.start()
 print("✓ Browser started")
 
 print()
-print("5. Waiting for devices (5 seconds)...")
-time.sleep(5)
+print(f"5. Waiting for devices (up to {SCAN_TIMEOUT:g} seconds)...")
+# Run the main run loop (the delegate is called from it) until the browser
+# says no more devices are coming, rather than always sleeping the timeout
+deadline = time.monotonic() + SCAN_TIMEOUT
+while not delegate.done and time.monotonic() < deadline:
+    NSRunLoop.currentRunLoop().runUntilDate_(NSDate.dateWithTimeIntervalSinceNow_(0.1))
 
 print()
 print("6. Checking for devices...")
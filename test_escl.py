@@ -14,6 +14,11 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # Scanner endpoint
 SCANNER_URL = "https://EPSON3BA687.local:443/eSCL"
 
+# Keep-alive session, as in scan_escl.py: further checks against the
+# scanner reuse the TLS connection instead of a new handshake each
+session = requests.Session()
+session.verify = False
+
 print("=" * 60)
 print("Testing eSCL (AirScan) Scanner Protocol")
 print("=" * 60)
@@ -25,48 +30,68 @@ print()
 # Test 1: Get scanner capabilities
 print("1. Getting scanner capabilities...")
 try:
-    response = requests.get(
+    response = session.get(
         f"{SCANNER_URL}/ScannerCapabilities",
-        verify=False,
-        timeout=10
+        timeout=10,
+        stream=True
     )
     
     if response.status_code == 200:
         print("✓ Scanner responded!")
         print()
         
-        # Parse XML response
-        root = ET.fromstring(response.content)
+        # Parse the XML in one pass as it streams in, instead of building
+        # the whole tree and searching it once per field
+        scan = '{http://schemas.hp.com/imaging/escl/2011/05/03}'
+        make = model = None
+        sources, modes, resolutions = [], [], []
+        resolution = None  # X/Y of the DiscreteResolution being read
         
-        # Extract namespace
-        ns = {'scan': 'http://schemas.hp.com/imaging/escl/2011/05/03'}
+        response.raw.decode_content = True
+        for event, elem in ET.iterparse(response.raw, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == scan + 'DiscreteResolution':
+                    resolution = {}
+                continue
+            
+            if tag == scan + 'Make' and make is None:
+                make = elem.text
+            elif tag == scan + 'Model' and model is None:
+                model = elem.text
+            elif tag == scan + 'InputSource':
+                sources.append(elem.text)
+            elif tag == scan + 'ColorMode':
+                modes.append(elem.text)
+            elif resolution is not None and tag in (scan + 'XResolution', scan + 'YResolution'):
+                resolution.setdefault(tag, elem.text)
+            elif tag == scan + 'DiscreteResolution':
+                x_res = resolution.get(scan + 'XResolution')
+                y_res = resolution.get(scan + 'YResolution')
+                if x_res is not None and y_res is not None:
+                    resolutions.append((x_res, y_res))
+                resolution = None
+            elem.clear()
         
         # Get scanner info
-        make = root.find('.//scan:Make', ns)
-        model = root.find('.//scan:Model', ns)
-        
         if make is not None and model is not None:
-            print(f"  Make: {make.text}")
-            print(f"  Model: {model.text}")
+            print(f"  Make: {make}")
+            print(f"  Model: {model}")
         
         # Get supported sources
         print("\n  Supported sources:")
-        for source in root.findall('.//scan:InputSource', ns):
-            source_name = source.text
+        for source_name in sources:
             print(f"    - {source_name}")
         
         # Get supported color modes
         print("\n  Supported color modes:")
-        for mode in root.findall('.//scan:ColorMode', ns):
-            print(f"    - {mode.text}")
+        for mode in modes:
+            print(f"    - {mode}")
         
         # Get supported resolutions
         print("\n  Supported resolutions:")
-        for res in root.findall('.//scan:DiscreteResolution', ns):
-            x_res = res.find('.//scan:XResolution', ns)
-            y_res = res.find('.//scan:YResolution', ns)
-            if x_res is not None and y_res is not None:
-                print(f"    - {x_res.text} x {y_res.text} DPI")
+        for x_res, y_res in resolutions:
+            print(f"    - {x_res} x {y_res} DPI")
         
         print("\n✓ eSCL scanner is working!")
         
@@ -22,11 +22,12 @@ print("Configuring scanner...")
 # Try to set source (with proper error handling)
 if 'source' in scanner.opt:
     try:
-        available_sources = scanner.opt['source'].constraint
+        source_opt = scanner.opt['source']
+        available_sources = source_opt.constraint
         print(f"  Available sources: {available_sources}")
         
         # Check if option is active
-        is_active = scanner.opt['source'].is_active()
+        is_active = source_opt.is_active()
         print(f"  Source option is_active: {is_active}")
         
         if is_active:
@@ -21,10 +21,22 @@ print("=" * 60)
 print("Scanner Options:")
 print("=" * 60)
 
+# Current values read below, so the source check doesn't ask the backend again
+values = {}
+
+# Options whose value isn't worth a backend read: buttons and groups have
+# none, and word arrays (gamma curves and other tables) are kilobytes each
+# and unreadable printed. The descriptor fields used here are already in
+# memory from when the device was opened
+SANE_WORD_SIZE = 4
+
+
+def is_table(opt):
+    return opt.type in (sane.TYPE_INT, sane.TYPE_FIXED) and opt.size > SANE_WORD_SIZE
+
 # List all available options
-for opt_name in scanner.opt.keys():
+for opt_name, opt in scanner.opt.items():
     try:
-        opt = scanner.opt[opt_name]
         print(f"\n{opt_name}:")
         print(f"  Title: {opt.title}")
         print(f"  Type: {opt.type}")
@@ -34,11 +46,19 @@ for opt_name in scanner.opt.keys():
         if hasattr(opt, 'constraint') and opt.constraint:
             print(f"  Possible values: {opt.constraint}")
         
-        # Try to get current value
+        if opt.type in (sane.TYPE_BUTTON, sane.TYPE_GROUP):
+            continue
+        if is_table(opt):
+            print(f"  Current value: (table of {opt.size // SANE_WORD_SIZE} values, not read)")
+            continue
+        
+        # Try to get current value. Each read is a backend round-trip
+        # (one per option on a network scanner), so read it only once
+        # rather than probing with hasattr first
         try:
-            if hasattr(scanner, opt_name):
-                current = getattr(scanner, opt_name)
-                print(f"  Current value: {current}")
+            current = getattr(scanner, opt_name)
+            values[opt_name] = current
+            print(f"  Current value: {current}")
         except:
             pass
             
@@ -55,7 +75,7 @@ for opt_name in ['source', 'doc-source', 'adf-mode', 'duplex', 'feeder']:
         print(f"\n✓ {opt_name} option available:")
         try:
             opt = scanner.opt[opt_name]
-            print(f"  Current: {getattr(scanner, opt_name, 'N/A')}")
+            print(f"  Current: {values.get(opt_name, 'N/A')}")
             if hasattr(opt, 'constraint'):
                 print(f"  Choices: {opt.constraint}")
         except Exception as e:
@@ -5,9 +5,20 @@ Test script for smart photo splitting with debug visualization
 import cv2
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-def test_edge_detection(image_path: str):
-    """Test edge detection with various parameters and visualizations"""
+from smart_split import PNG_PARAMS
+
+def test_edge_detection(image_path: str, scale: int = 1):
+    """
+    Test edge detection with various parameters and visualizations
+
+    Args:
+        image_path: Scan to analyze
+        scale: Run the contour pipeline (method 3) on a copy shrunk scale
+            times, like smart_split.detect_photos(scale=...). Contours are
+            scaled back to full-resolution pixels.
+    """
     print("=" * 60)
     print("Smart Photo Splitter - Debug Test")
     print("=" * 60)
@@ -31,33 +42,45 @@ def test_edge_detection(image_path: str):
     # Method 1: Canny with different thresholds
     print("\n1. Canny Edge Detection:")
     thresholds = [(50, 150), (30, 100), (100, 200)]
+    # Gradients are the same for every threshold pair, so compute them once
+    # (3x3 Sobel with replicated borders, exactly what Canny does itself)
+    dx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE)
+    dy = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE)
     for low, high in thresholds:
-        edges = cv2.Canny(gray, low, high)
-        edge_pixels = np.sum(edges > 0)
+        edges = cv2.Canny(dx, dy, low, high)
+        edge_pixels = cv2.countNonZero(edges)
         print(f"  Threshold ({low}, {high}): {edge_pixels} edge pixels")
     
     # Method 2: Adaptive thresholding
     print("\n2. Adaptive Threshold:")
     adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                      cv2.THRESH_BINARY, 11, 2)
-    adaptive_pixels = np.sum(adaptive == 0)
+    adaptive_pixels = adaptive.size - cv2.countNonZero(adaptive)
     print(f"  Black pixels: {adaptive_pixels}")
     
     # Method 3: Contour detection with different approaches
     print("\n3. Contour Detection:")
     
-    # Use bilateral filter to reduce noise while keeping edges sharp
-    blurred = cv2.bilateralFilter(gray, 9, 75, 75)
+    # Work on a shrunk copy if asked
+    small = gray
+    if scale > 1:
+        small = cv2.resize(gray, (w // scale, h // scale), interpolation=cv2.INTER_AREA)
+    
+    # Gaussian blur to reduce noise (same as smart_split's detect_photos;
+    # a bilateral filter found the same photos at many times the cost)
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
     
     # Canny edge detection
     edges = cv2.Canny(blurred, 30, 100)
     
-    # Dilate to connect nearby edges
-    kernel = np.ones((5, 5), np.uint8)
-    dilated = cv2.dilate(edges, kernel, iterations=2)
+    # Dilate to connect nearby edges (one 9x9 pass equals two 5x5 ones)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9))
+    dilated = cv2.dilate(edges, kernel)
     
     # Find contours
     contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if scale > 1:
+        contours = [cnt * scale for cnt in contours]
     print(f"  Found {len(contours)} contours")
     
     # Filter contours by area
@@ -89,25 +112,41 @@ def test_edge_detection(image_path: str):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     print(f"\nSaving debug images to {output_dir}/")
-    cv2.imwrite(str(output_dir / "1_gray.png"), gray)
-    cv2.imwrite(str(output_dir / "2_blurred.png"), blurred)
-    cv2.imwrite(str(output_dir / "3_edges.png"), edges)
-    cv2.imwrite(str(output_dir / "4_dilated.png"), dilated)
+    # imwrite releases the GIL while libpng compresses, so the images are
+    # encoded on a thread pool (the first four while the overlay is drawn)
+    def save(name, image):
+        cv2.imwrite(str(output_dir / name), image, PNG_PARAMS)
+    
+    pool = ThreadPoolExecutor(max_workers=4)
+    saves = [
+        pool.submit(save, "1_gray.png", gray),
+        pool.submit(save, "2_blurred.png", blurred),
+        pool.submit(save, "3_edges.png", edges),
+        pool.submit(save, "4_dilated.png", dilated),
+    ]
     
     # Draw contours on original image
     debug_img = img.copy()
     cv2.drawContours(debug_img, valid_contours, -1, (0, 255, 0), 3)
-    for i, cnt in enumerate(valid_contours):
-        x, y, cw, ch = cv2.boundingRect(cnt)
-        cv2.rectangle(debug_img, (x, y), (x + cw, y + ch), (255, 0, 0), 2)
+    # Bounding boxes in one polylines call; labels share their color, so
+    # drawing them afterwards gives the same image
+    bboxes = [cv2.boundingRect(cnt) for cnt in valid_contours]
+    rect_polys = [np.array([[x, y], [x + cw, y], [x + cw, y + ch], [x, y + ch]],
+                           dtype=np.int32).reshape(-1, 1, 2)
+                  for x, y, cw, ch in bboxes]
+    cv2.polylines(debug_img, rect_polys, True, (255, 0, 0), 2)
+    for i, (x, y, cw, ch) in enumerate(bboxes):
         cv2.putText(debug_img, f"#{i+1}", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 
                    0.9, (255, 0, 0), 2)
     
-    cv2.imwrite(str(output_dir / "5_contours.png"), debug_img)
+    saves.append(pool.submit(save, "5_contours.png", debug_img))
+    pool.shutdown()
+    for future in saves:
+        future.result()  # Re-raise any error from the writes
     
     print("\nDebug images saved:")
     print("  1_gray.png - Grayscale")
-    print("  2_blurred.png - Bilateral filter")
+    print("  2_blurred.png - Gaussian blur")
     print("  3_edges.png - Canny edges")
     print("  4_dilated.png - Dilated edges")
     print("  5_contours.png - Detected contours")
@@ -104,8 +104,7 @@ def check_scanner():
     print("   - Close the scanner lid completely")
     print()
     print("3. Try scanning again:")
-    print("   - Run: uv run poc_scan.py")
-    print("   - Press Enter when prompted")
+    print("   - Run: uv run poc_scan.py (starts scanning right away)")
     print()
     print("4. If still failing:")
     print("   - Power cycle the scanner (turn off, wait 10s, turn on)")
@@ -122,7 +121,7 @@ def check_scanner():
     print()
     print("While troubleshooting the scanner, you can use:")
     print("  uv run simulate_scan.py")
-    print("  uv run poc_split.py simulated_scan_*.png")
+    print("  uv run poc_split.py simulated_scan_*.jpg")
     print()
 
 